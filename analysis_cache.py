@@ -0,0 +1,381 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+
+
+def history_fingerprint(symbols, values):
+    """
+    Content hash of the price history an analysis runs on
+    Args:
+        symbols: Column order of ``values``
+        values: 2-D array (observations x symbols) of prices
+    Returns:
+        str: hex digest that changes only when the symbol set or history changes
+    """
+    order = np.argsort(np.asarray(symbols, dtype=object).astype(str))
+    values = np.ascontiguousarray(np.asarray(values, dtype=np.float64)[:, order])
+
+    digest = hashlib.sha256()
+    digest.update('\x1f'.join(str(symbols[i]) for i in order).encode('utf-8'))
+    digest.update(str(values.shape).encode('ascii'))
+    digest.update(values.tobytes())
+    return digest.hexdigest()
+
+
+def series_fingerprint(values):
+    """Short content hash of one price series (used in per-pair cache keys)"""
+    values = np.ascontiguousarray(np.asarray(values, dtype=np.float64))
+    return hashlib.blake2b(values.tobytes(), digest_size=12).hexdigest()
+
+
+class _StampedeProtection:
+    """Shared get-or-compute logic; subclasses provide get, set and lock"""
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value for key, computing and storing it on a miss.
+
+        Only one caller per key computes at a time (across processes for a
+        shared backend); concurrent callers wait on the key's lock and then
+        reuse the stored result instead of recomputing it.
+        Returns:
+            tuple: (value, cached) where cached is False if compute() ran here
+        """
+        value = self.get(key)
+        if value is not None:
+            return value, True
+
+        with self.lock(key):
+            value = self.get(key, count=False)
+            if value is not None:
+                self._count_shared_hit()
+                return value, True
+            value = compute()
+            self.set(key, value)
+            return value, False
+
+
+class AnalysisCache(_StampedeProtection):
+    """
+    Bounded in-process result cache with LRU eviction and a time-to-live.
+
+    Entries expire ``ttl_seconds`` after they were stored; when the cache is
+    full the least recently used entry is evicted. Hit, miss, eviction and
+    expiry counters are kept for the health endpoint.
+    """
+
+    backend = 'memory'
+
+    def __init__(self, max_entries=64, ttl_seconds=1800):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @contextmanager
+    def lock(self, key):
+        """Per-key lock so concurrent threads compute a key only once"""
+        with self._lock:
+            key_lock, waiters = self._key_locks.get(key, (threading.Lock(), 0))
+            self._key_locks[key] = (key_lock, waiters + 1)
+        try:
+            with key_lock:
+                yield
+        finally:
+            with self._lock:
+                key_lock, waiters = self._key_locks[key]
+                if waiters == 1:
+                    del self._key_locks[key]
+                else:
+                    self._key_locks[key] = (key_lock, waiters - 1)
+
+    def _count_shared_hit(self):
+        """The lookup that missed was served by another caller's result"""
+        with self._lock:
+            self.misses -= 1
+            self.hits += 1
+
+    def get(self, key, count=True):
+        """Return the cached value for key, or None on a miss or expired entry"""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += count
+                return None
+
+            stored_at, value = item
+            if time.time() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += count
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += count
+            return value
+
+    def set(self, key, value):
+        """Store value under key, evicting least recently used entries if full"""
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_many(self, keys):
+        """Look up many keys under one lock acquisition; misses are None"""
+        now = time.time()
+        values = []
+        with self._lock:
+            for key in keys:
+                item = self._entries.get(key)
+                if item is not None and now - item[0] > self.ttl_seconds:
+                    del self._entries[key]
+                    self.expirations += 1
+                    item = None
+                if item is None:
+                    self.misses += 1
+                    values.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    values.append(item[1])
+        return values
+
+    def set_many(self, items):
+        """Store many (key, value) pairs under one lock acquisition"""
+        now = time.time()
+        with self._lock:
+            for key, value in items:
+                self._entries[key] = (now, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Remove every entry and return how many were removed"""
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            return count
+
+    def values(self):
+        """Snapshot of the live cached values, most recently used last"""
+        now = time.time()
+        with self._lock:
+            return [
+                value for stored_at, value in self._entries.values()
+                if now - stored_at <= self.ttl_seconds
+            ]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        """Counters for the health endpoint"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": self.backend,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+class SQLiteAnalysisCache(_StampedeProtection):
+    """
+    Result cache shared by every process on the host through one SQLite file.
+
+    Values are stored as JSON with their store and last-access times, so
+    TTL expiry and LRU eviction behave like ``AnalysisCache`` but survive
+    restarts and are visible to all server workers. Compute locks are rows
+    in a ``locks`` table with an expiry, so a crashed worker cannot block a
+    key forever. Hit/miss counters are per process.
+    """
+
+    backend = 'sqlite'
+
+    def __init__(self, path, max_entries=64, ttl_seconds=1800,
+                 lock_timeout=300, poll_interval=0.1):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS locks ("
+                "key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        """
+        One connection per thread (sqlite3 connections are not thread-safe),
+        reopened after a fork so preloaded server workers never share one
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, **deltas):
+        with self._stats_lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def _count_shared_hit(self):
+        """The lookup that missed was served by another worker's result"""
+        self._count(misses=-1, hits=1)
+
+    def get(self, key, count=True):
+        """Return the cached value for key, or None on a miss or expired entry"""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, stored_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._count(misses=int(count))
+                return None
+
+            value, stored_at = row
+            if now - stored_at > self.ttl_seconds:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._count(expirations=1, misses=int(count))
+                return None
+
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        self._count(hits=int(count))
+        return json.loads(value)
+
+    def set(self, key, value):
+        """Store value under key, evicting least recently used entries if full"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            evicted = conn.execute(
+                "DELETE FROM entries WHERE key IN ("
+                "SELECT key FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+        if evicted > 0:
+            self._count(evictions=evicted)
+
+    @contextmanager
+    def lock(self, key):
+        """
+        Cross-process compute lock for key. Waits up to lock_timeout seconds
+        for another worker to finish, then proceeds without the lock.
+        """
+        owner = uuid.uuid4().hex
+        deadline = time.time() + self.lock_timeout
+        acquired = False
+        while True:
+            now = time.time()
+            with self._connect() as conn:
+                conn.execute("DELETE FROM locks WHERE key = ? AND expires_at < ?", (key, now))
+                acquired = conn.execute(
+                    "INSERT OR IGNORE INTO locks (key, owner, expires_at) VALUES (?, ?, ?)",
+                    (key, owner, now + self.lock_timeout)
+                ).rowcount == 1
+            if acquired or now >= deadline:
+                break
+            time.sleep(self.poll_interval)
+        try:
+            yield
+        finally:
+            if acquired:
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM locks WHERE key = ? AND owner = ?", (key, owner))
+
+    def clear(self):
+        """Remove every entry and return how many were removed"""
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM entries").rowcount
+
+    def values(self):
+        """Snapshot of the live cached values, most recently used last"""
+        cutoff = time.time() - self.ttl_seconds
+        rows = self._connect().execute(
+            "SELECT value FROM entries WHERE stored_at >= ? ORDER BY accessed_at", (cutoff,)
+        ).fetchall()
+        return [json.loads(value) for (value,) in rows]
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def stats(self):
+        """Counters for the health endpoint (hits/misses are for this process)"""
+        entries = len(self)
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": self.backend,
+                "path": self.path,
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+def create_analysis_cache(backend='memory', path=None, max_entries=64, ttl_seconds=1800):
+    """
+    Build the analysis result cache for the configured backend
+    Args:
+        backend: 'memory' (per process) or 'sqlite' (shared through a local file)
+        path: SQLite database path for the 'sqlite' backend
+    """
+    if backend == 'sqlite':
+        return SQLiteAnalysisCache(path, max_entries=max_entries, ttl_seconds=ttl_seconds)
+    if backend != 'memory':
+        raise ValueError(f"Unknown cache backend: {backend}")
+    return AnalysisCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
@@ -0,0 +1,196 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from analysis_logging import get_logger
+
+logger = get_logger('jobs')
+
+
+class JobCancelled(Exception):
+    """Raised from a job's progress callback once the job has been cancelled"""
+
+
+class AnalysisJob:
+    """State of one background analysis, updated by the worker thread"""
+
+    def __init__(self, key, symbols):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.symbols = symbols
+        self.status = 'queued'  # queued -> running -> done | failed | cancelled
+        self.stage = 'queued'
+        self.pairs_done = 0
+        self.pairs_total = 0
+        self.edges = []  # edges reported while the analysis runs, for streams
+        self.result = None
+        self.error = None
+        self.error_type = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.version = 0  # bumped on every change so streams can wait for news
+        self.listeners = 0  # attached streams
+        self.abandonable = False  # cancel once the last stream detaches
+        self.cancel_requested = False
+        self._changed = threading.Condition()
+
+    def _touch(self):
+        with self._changed:
+            self.version += 1
+            self._changed.notify_all()
+
+    def set_stage(self, stage):
+        self.stage = stage
+        self._touch()
+
+    def progress(self, pairs_done, pairs_total):
+        """
+        Progress callback handed to the analysis (Granger pairs done / total);
+        raises JobCancelled to stop the analysis once the job is cancelled
+        """
+        if self.cancel_requested:
+            raise JobCancelled(f"Job {self.id} cancelled")
+        self.pairs_done = pairs_done
+        self.pairs_total = pairs_total
+        self._touch()
+
+    def add_edge(self, edge):
+        """Edge callback handed to the analysis"""
+        self.edges.append(edge)
+        self._touch()
+
+    def wait_for_change(self, version, timeout):
+        """Block until the job changes past ``version`` or timeout; returns the new version"""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version, timeout=timeout)
+            return self.version
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed', 'cancelled')
+
+    def to_dict(self, include_result=True):
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "symbols": self.symbols,
+            "progress": {
+                "pairs_done": self.pairs_done,
+                "pairs_total": self.pairs_total,
+                "percent": round(self.pairs_done / self.pairs_total * 100, 1) if self.pairs_total else 0.0
+            },
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+        if self.error is not None:
+            data["error"] = self.error
+        if include_result and self.result is not None:
+            data["result"] = self.result
+        return data
+
+
+class JobManager:
+    """
+    Runs long analyses on a background thread pool.
+
+    Submitting a key that already has a queued or running job returns that
+    job instead of starting another, so identical in-flight requests share
+    one computation. Finished jobs are kept for ``retention_seconds`` so
+    clients can collect their result. Jobs followed only by streams are
+    cancelled when the last stream detaches (see ``submit``).
+    """
+
+    def __init__(self, max_workers=2, retention_seconds=600):
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis-job')
+        self._jobs = {}
+        self._active = {}  # key -> job id for queued/running jobs
+        self._lock = threading.Lock()
+
+    def submit(self, key, symbols, run, stream=False):
+        """
+        Start ``run(job)`` in the background, or join the in-flight job for key
+        Args:
+            key: Deduplication key
+            symbols: Symbols the job analyses (reported in its status)
+            run: Callable taking the job and returning its result
+            stream: The caller follows the job over a stream and detaches with
+                    release(); a job only streams are attached to is cancelled
+                    when the last of them detaches. Jobs submitted without
+                    stream are polled and always run to completion.
+        Returns:
+            tuple: (job, created) where created is False if an existing job was reused
+        """
+        with self._lock:
+            self._purge()
+            active_id = self._active.get(key)
+            # A job being cancelled is not joined; a new one replaces it
+            if active_id is not None and not self._jobs[active_id].cancel_requested:
+                job = self._jobs[active_id]
+                if stream:
+                    job.listeners += 1
+                else:
+                    job.abandonable = False
+                return job, False
+
+            job = AnalysisJob(key, symbols)
+            if stream:
+                job.listeners = 1
+                job.abandonable = True
+            self._jobs[job.id] = job
+            self._active[key] = job.id
+
+        self._executor.submit(self._run, job, run)
+        return job, True
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def release(self, job):
+        """Detach a stream from its job, cancelling the job if nobody else wants it"""
+        with self._lock:
+            job.listeners -= 1
+            if job.listeners <= 0 and job.abandonable and not job.finished:
+                job.cancel_requested = True
+
+    def _run(self, job, run):
+        try:
+            if job.cancel_requested:
+                raise JobCancelled(f"Job {job.id} abandoned while queued")
+            job.status = 'running'
+            job.started_at = time.time()
+            job.set_stage('running')
+            job.result = run(job)
+            job.status = 'done'
+        except JobCancelled:
+            job.status = 'cancelled'
+        except Exception as e:
+            logger.exception("Job %s failed", job.id)
+            job.error = str(e)
+            job.error_type = type(e).__name__
+            job.status = 'failed'
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                if self._active.get(job.key) == job.id:
+                    del self._active[job.key]
+            job.set_stage(job.status)
+
+    def _purge(self):
+        """Drop finished jobs past their retention (caller holds the lock)"""
+        cutoff = time.time() - self.retention_seconds
+        for job_id in [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and job.finished_at < cutoff
+        ]:
+            del self._jobs[job_id]
+
+    def stats(self):
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {status: statuses.count(status) for status in ('queued', 'running', 'done', 'failed', 'cancelled')}
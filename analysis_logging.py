@@ -0,0 +1,76 @@
+import json
+import logging
+import os
+import sys
+
+# Level of the 'lakshmi' loggers, and their output format: 'text' or 'json'
+LOG_LEVEL = os.environ.get('LAKSHMI_LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.environ.get('LAKSHMI_LOG_FORMAT', 'text')
+
+# At DEBUG, per-pair lines (one per edge) are logged for every Nth pair only
+PAIR_LOG_SAMPLE = int(os.environ.get('LAKSHMI_LOG_PAIR_SAMPLE', 50))
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, for log shippers"""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage()
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+def get_logger(name):
+    """Logger under the 'lakshmi' tree, e.g. get_logger('analysis') -> 'lakshmi.analysis'"""
+    return logging.getLogger(f"lakshmi.{name}")
+
+
+def configure_logging(level=None, log_format=None, stream=None):
+    """
+    Attach one handler to the 'lakshmi' logger; later calls only change the level
+    Args:
+        level: Level name (defaults to LAKSHMI_LOG_LEVEL)
+        log_format: 'text' or 'json' (defaults to LAKSHMI_LOG_FORMAT)
+        stream: Output stream (defaults to stdout, where the server always logged)
+    """
+    root = logging.getLogger('lakshmi')
+    root.setLevel(level or LOG_LEVEL)
+    if root.handlers:
+        return root
+
+    handler = logging.StreamHandler(stream or sys.stdout)
+    if (log_format or LOG_FORMAT) == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)-7s %(name)s: %(message)s'))
+    root.addHandler(handler)
+    root.propagate = False
+    return root
+
+
+class PairSampler:
+    """
+    Decides which per-pair debug lines a hot loop emits.
+
+    Built once per loop: when DEBUG is off it is a single attribute check
+    per pair and nothing is formatted; when on, every ``every``-th call
+    (starting with the first) returns True.
+    """
+
+    def __init__(self, logger, every=PAIR_LOG_SAMPLE):
+        self.enabled = every > 0 and logger.isEnabledFor(logging.DEBUG)
+        self.every = every
+        self.seen = 0
+
+    def __call__(self):
+        if not self.enabled:
+            return False
+        self.seen += 1
+        return (self.seen - 1) % self.every == 0
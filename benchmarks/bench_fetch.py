@@ -0,0 +1,51 @@
+"""
+Compare serial, concurrent and batch history fetching against the local stub API.
+
+Usage:
+    python benchmarks/bench_fetch.py [--symbols 30] [--latency 0.2] [--concurrency 8]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import stock_influence_analysis as sia
+from stub_yahoo_server import StubYahooServer
+
+
+def time_fetch(symbols, concurrency, mode='concurrent'):
+    """Run the fetch stage once with its log output suppressed"""
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fetched = sia.fetch_histories(symbols, mode=mode, concurrency=concurrency)
+    return time.perf_counter() - started, len(fetched)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=30)
+    parser.add_argument('--latency', type=float, default=0.2, help="stub latency per request (s)")
+    parser.add_argument('--concurrency', type=int, default=sia.FETCH_CONCURRENCY)
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i:03d}.NS" for i in range(args.symbols)]
+
+    with StubYahooServer(latency=args.latency) as stub:
+        sia.YAHOO_API_BASE = stub.url
+        serial, serial_ok = time_fetch(symbols, 1)
+        concurrent, concurrent_ok = time_fetch(symbols, args.concurrency)
+        batch, batch_ok = time_fetch(symbols, args.concurrency, mode='batch')
+
+    print(f"symbols={args.symbols} latency={args.latency}s")
+    print(f"serial      : {serial:.2f}s ({serial_ok} ok)")
+    print(f"concurrent  : {concurrent:.2f}s ({concurrent_ok} ok, concurrency={args.concurrency})")
+    print(f"batch       : {batch:.2f}s ({batch_ok} ok, one request)")
+    print(f"speedup     : {serial / concurrent:.1f}x concurrent, {serial / batch:.1f}x batch")
+
+
+if __name__ == '__main__':
+    main()
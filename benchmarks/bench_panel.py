@@ -0,0 +1,97 @@
+"""
+Compare peak memory (tracemalloc) and time of building the analysis inputs as
+a pandas DataFrame versus a float64 / float32 PricePanel, and of a full
+analysis on each panel type. Histories come from the local stub API.
+
+Usage:
+    python benchmarks/bench_panel.py [--symbols 50] [--bars 250] [--repeat 3]
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import stock_influence_analysis as sia
+from price_panel import align_closes
+from stub_yahoo_server import StubYahooServer
+
+
+def measure(run, repeat):
+    """Median seconds and median tracemalloc peak (bytes) of ``run()``"""
+    seconds, peaks = [], []
+    for _ in range(repeat):
+        tracemalloc.start()
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            run()
+        seconds.append(time.perf_counter() - started)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return statistics.median(seconds), statistics.median(peaks)
+
+
+def frame_inputs(histories):
+    """The DataFrame route: outer join, forward-fill, then diff and pct_change"""
+    import pandas as pd
+
+    series = {
+        symbol: pd.Series(closes, index=pd.DatetimeIndex(dates))
+        for symbol, (dates, closes) in histories.items()
+    }
+    data = pd.concat(series, axis=1, join='outer', sort=True).ffill().dropna()
+    return data.values, data.diff().dropna().values, data.pct_change().dropna().values
+
+
+def panel_inputs(histories, dtype):
+    panel, _ = align_closes(histories, dtype=dtype)
+    return panel.values, panel.diffs(), panel.returns()
+
+
+def full_analysis(histories, dtype):
+    """Build the panel and run the whole analysis with cold in-process caches"""
+    panel, _ = align_closes(histories, dtype=dtype)
+    sia._pair_stats_cache = None
+    sia._correlation_cache = None
+    sia.analyze_stock_influence({symbol: {} for symbol in panel.symbols}, history=(panel, {}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=50)
+    parser.add_argument('--bars', type=int, default=250)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i:03d}.NS" for i in range(args.symbols)]
+    with StubYahooServer(bars=args.bars, latency=0.0) as stub:
+        sia.YAHOO_API_BASE = stub.url
+        with contextlib.redirect_stdout(io.StringIO()):
+            histories = sia.fetch_histories(symbols, timeframe='1y')
+    # Import pandas and scipy outside the measured runs
+    frame_inputs(histories)
+    sia.preload_analysis_modules()
+
+    runs = {
+        "inputs: DataFrame": lambda: frame_inputs(histories),
+        "inputs: panel float64": lambda: panel_inputs(histories, np.float64),
+        "inputs: panel float32": lambda: panel_inputs(histories, np.float32),
+        "analysis: panel float64": lambda: full_analysis(histories, np.float64),
+        "analysis: panel float32": lambda: full_analysis(histories, np.float32),
+    }
+
+    print(f"symbols={len(histories)} bars={args.bars} repeat={args.repeat} (medians)")
+    for label, run in runs.items():
+        seconds, peak = measure(run, args.repeat)
+        print(f"{label:<24}: {seconds * 1000:8.1f} ms, peak {peak / 1024:9.1f} KiB")
+
+
+if __name__ == '__main__':
+    main()
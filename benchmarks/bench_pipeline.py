@@ -0,0 +1,203 @@
+"""
+Benchmark the full influence analysis pipeline over a grid of panel sizes.
+
+Every configuration fetches seeded random-walk histories from the local stub
+API, served from a child process (no Next.js app or Yahoo needed), aligns
+them into a price panel and runs the analysis with cold in-process caches. Reported per configuration: wall
+time per stage (fetch, align, correlations, granger, naive_bayes, dedup,
+serialize), Granger pairs per second and the tracemalloc peak of one extra
+traced run. Results are written as JSON; pass an earlier file to --compare
+to print the change per stage.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--symbols 5 20 50 100 200] [--bars 120 250 1000]
+        [--repeat 1] [--granger-workers 1] [--output FILE] [--compare OLD.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+import stock_influence_analysis as sia
+from price_panel import align_closes
+from stub_yahoo_server import StubYahooServer
+
+STAGES = ('fetch', 'align', 'correlations', 'granger', 'naive_bayes', 'dedup', 'serialize')
+
+
+def _serve_stub(bars, urls, stop):
+    """Child process entry point (module level, so spawn-started children can import it)"""
+    with StubYahooServer(bars=bars, latency=0.0) as stub:
+        urls.put(stub.url)
+        stop.wait()
+
+
+@contextlib.contextmanager
+def stub_api(bars):
+    """
+    Stub API in a child process, so its work and allocations stay out of the
+    timings and the traced memory peak; yields its base URL
+    """
+    # The platform's default start method: fork on Linux, spawn on Windows and macOS
+    urls, stop = multiprocessing.Queue(), multiprocessing.Event()
+    process = multiprocessing.Process(target=_serve_stub, args=(bars, urls, stop), daemon=True)
+    process.start()
+    try:
+        yield urls.get(timeout=60)
+    finally:
+        stop.set()
+        process.join(timeout=10)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+
+
+def run_pipeline(symbols, granger_workers):
+    """One cold pipeline run; returns (seconds per stage, Granger pairs computed)"""
+    sia._pair_stats_cache = None
+    sia._correlation_cache = None
+    seconds = {}
+
+    started = time.perf_counter()
+    # The stub ignores unknown timeframes and serves every bar it has
+    histories = sia.fetch_histories(symbols, timeframe='max', min_points=30)
+    seconds['fetch'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    panel, _ = align_closes(histories, min_days=sia.MIN_ALIGNED_DAYS, dtype=sia.PANEL_DTYPE)
+    seconds['align'] = time.perf_counter() - started
+
+    data_sources = {symbol: "Yahoo Finance (Real)" for symbol in panel.symbols}
+    entry = sia.run_analysis(
+        {symbol: {} for symbol in panel.symbols}, granger_workers=granger_workers,
+        history=(panel, data_sources)
+    )
+    summary = entry['analysis_summary']
+    for stage, stage_seconds in summary['stage_seconds'].items():
+        seconds[stage] = stage_seconds
+
+    started = time.perf_counter()
+    json.dumps(entry)
+    seconds['serialize'] = time.perf_counter() - started
+    return seconds, summary['pair_stats'].get('computed', 0)
+
+
+def benchmark(n_symbols, bars, repeat, granger_workers, memory=True):
+    symbols = [f"BENCH{i:03d}.NS" for i in range(n_symbols)]
+    with stub_api(bars) as url:
+        sia.YAHOO_API_BASE = url
+        runs = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(repeat):
+                runs.append(run_pipeline(symbols, granger_workers))
+
+            peak = None
+            if memory:
+                tracemalloc.start()
+                run_pipeline(symbols, granger_workers)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+    stages = {stage: round(statistics.median(run[0].get(stage, 0.0) for run in runs), 4) for stage in STAGES}
+    pairs = runs[0][1]
+    return {
+        "symbols": n_symbols,
+        "bars": bars,
+        "stage_seconds": stages,
+        "total_seconds": round(sum(stages.values()), 4),
+        "granger_pairs": pairs,
+        "pairs_per_second": round(pairs / stages['granger'], 1) if stages['granger'] else None,
+        "peak_memory_bytes": peak
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(results, baseline):
+    """Per-configuration ratio of new to old stage times (below 1.0 is faster)"""
+    old = {(r['symbols'], r['bars']): r for r in baseline['results']}
+    print(f"\nvs {baseline.get('revision')}: new / old wall time")
+    for result in results:
+        previous = old.get((result['symbols'], result['bars']))
+        if previous is None:
+            continue
+        ratios = []
+        for stage in STAGES + ('total',):
+            new = result['total_seconds'] if stage == 'total' else result['stage_seconds'][stage]
+            was = previous['total_seconds'] if stage == 'total' else previous['stage_seconds'].get(stage, 0)
+            ratios.append(f"{stage} {new / was:.2f}" if was else f"{stage} -")
+        print(f"{result['symbols']:>4} x {result['bars']:<5}: " + ", ".join(ratios))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, nargs='+', default=[5, 20, 50, 100, 200])
+    parser.add_argument('--bars', type=int, nargs='+', default=[120, 250, 1000])
+    parser.add_argument('--repeat', type=int, default=1, help="timed runs per configuration (median)")
+    parser.add_argument('--granger-workers', type=int, default=1)
+    parser.add_argument('--no-memory', action='store_true', help="skip the traced run for peak memory")
+    parser.add_argument('--output', help="JSON results path (default benchmarks/results/pipeline-<rev>.json)")
+    parser.add_argument('--compare', help="earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    sia.HISTORY_STORE_DIR = ''  # every run fetches from the stub
+    sia.preload_analysis_modules()
+
+    revision = git_revision()
+    results = []
+    print(f"{'symbols':>7} {'bars':>5} " + " ".join(f"{stage:>12}" for stage in STAGES)
+          + f" {'total':>8} {'pairs/s':>9} {'peak MiB':>9}")
+    for n_symbols in args.symbols:
+        for bars in args.bars:
+            result = benchmark(n_symbols, bars, args.repeat, args.granger_workers, memory=not args.no_memory)
+            results.append(result)
+            peak = result['peak_memory_bytes']
+            print(f"{n_symbols:>7} {bars:>5} "
+                  + " ".join(f"{result['stage_seconds'][stage]:>12.4f}" for stage in STAGES)
+                  + f" {result['total_seconds']:>8.3f} {result['pairs_per_second'] or 0:>9.0f}"
+                  + f" {peak / 2 ** 20 if peak is not None else float('nan'):>9.1f}")
+
+    report = {
+        "revision": revision,
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "granger_workers": args.granger_workers,
+        "repeat": args.repeat,
+        "panel_dtype": str(sia.PANEL_DTYPE),
+        "results": results
+    }
+    output = args.output or os.path.join(ROOT, 'benchmarks', 'results', f"pipeline-{revision or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Measure analysis server startup: module import, cold start to the first
+healthy /api/health response, and to the first analysis served.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 3] [--server dev] [--watch]
+"""
+import argparse
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import requests
+
+from stub_yahoo_server import StubYahooServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, 'stock_influence_analysis.py')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def time_import(module):
+    """Seconds for a fresh interpreter to import ``module``"""
+    started = time.perf_counter()
+    subprocess.run([sys.executable, '-c', f"import {module}"], cwd=ROOT, check=True,
+                   stdout=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+
+def start_server(args, env):
+    """Start the server script in its own process group, so stop_server reaches its children"""
+    if os.name == 'nt':
+        group = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        group = {"start_new_session": True}
+    return subprocess.Popen([sys.executable, SCRIPT] + args, cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **group)
+
+
+def stop_server(process):
+    """Interrupt the server's process group (a --watch supervisor and its server), then kill it"""
+    if os.name == 'nt':
+        process.send_signal(signal.CTRL_BREAK_EVENT)
+    else:
+        os.killpg(process.pid, signal.SIGINT)
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        if os.name == 'nt':
+            subprocess.run(['taskkill', '/F', '/T', '/PID', str(process.pid)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+
+
+def time_cold_start(args, env, port, prices, timeout=60):
+    """
+    Start the server and return (seconds to first healthy response,
+    seconds to first analysis response)
+    """
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = start_server(args, env)
+    try:
+        healthy = None
+        while time.perf_counter() - started < timeout:
+            try:
+                if requests.get(f"{base}/api/health", timeout=1).ok:
+                    healthy = time.perf_counter() - started
+                    break
+            except requests.RequestException:
+                time.sleep(0.02)
+        if healthy is None:
+            raise RuntimeError(f"server did not become healthy within {timeout}s")
+
+        response = requests.post(f"{base}/api/granger-causality", json={"stock_prices": prices}, timeout=timeout)
+        response.raise_for_status()
+        return healthy, time.perf_counter() - started
+    finally:
+        stop_server(process)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--server', default='dev', help="dev, waitress or gunicorn")
+    parser.add_argument('--symbols', type=int, default=10)
+    parser.add_argument('--watch', action='store_true', help="also time the --watch supervisor")
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i:03d}.NS" for i in range(args.symbols)]
+    prices = {symbol: {"price": 100.0 + i, "changePercent": 0.5} for i, symbol in enumerate(symbols)}
+
+    imports = {
+        module: statistics.median(time_import(module) for _ in range(args.repeat))
+        for module in ('dev_supervisor', 'stock_influence_analysis')
+    }
+
+    runs = {f"--run-server --server {args.server}": ['--run-server', '--server', args.server]}
+    if args.watch:
+        runs['--watch'] = ['--watch']
+
+    results = {}
+    with StubYahooServer(latency=0.0) as stub:
+        for label, cli in runs.items():
+            timings = []
+            for _ in range(args.repeat):
+                port = free_port()
+                env = dict(os.environ, LAKSHMI_API_BASE=stub.url, LAKSHMI_PORT=str(port),
+                           LAKSHMI_HISTORY_DIR='', LAKSHMI_CACHE_BACKEND='memory')
+                timings.append(time_cold_start(cli, env, port, prices))
+            results[label] = (
+                statistics.median(t[0] for t in timings),
+                statistics.median(t[1] for t in timings)
+            )
+
+    print(f"repeat={args.repeat} symbols={args.symbols} (medians)")
+    for module, seconds in imports.items():
+        print(f"import {module:<26}: {seconds:.2f}s")
+    for label, (healthy, analysed) in results.items():
+        print(f"{label:<33}: healthy {healthy:.2f}s, first analysis {analysed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Local stand-in for the Next.js Yahoo Finance API used by the benchmarks.
+
+Serves deterministic random-walk daily bars for any symbol with a fixed
+artificial latency, so fetch-stage timings can be measured without the
+Next.js app or network access to Yahoo.
+"""
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+
+# Calendar days covered by each /api/yahoo-finance timeframe
+TIMEFRAME_DAYS = {'1d': 1, '5d': 5, '1m': 31, '3m': 92, '6m': 183, '1y': 366}
+
+
+def stub_history(symbol, bars, timeframe=None):
+    """
+    Deterministic weekday bars ending today, shaped like /api/yahoo-finance rows.
+    When a timeframe is given only the bars inside it are returned.
+    """
+    rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, bars)))
+    days = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=bars)
+    if timeframe in TIMEFRAME_DAYS:
+        keep = days >= days[-1] - pd.Timedelta(days=TIMEFRAME_DAYS[timeframe])
+        days, closes = days[keep], closes[keep]
+    return [
+        {
+            "date": day.strftime('%Y-%m-%d'),
+            "time": day.strftime('%H:%M'),
+            "timestamp": int(day.timestamp() * 1000),
+            "open": float(close),
+            "high": float(close),
+            "low": float(close),
+            "close": float(close),
+            "volume": 0
+        }
+        for day, close in zip(days, closes)
+    ]
+
+
+class StubYahooServer:
+    """Threaded HTTP server answering the Yahoo Finance and index-members API routes on a free local port"""
+
+    def __init__(self, bars=125, latency=0.05, index_size=50):
+        self.bars = bars
+        self.index_size = index_size
+        self.latency = latency
+        self.requests = 0
+        self.bytes_sent = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                if url.path == '/api/index-members':
+                    # Any index name resolves to index_size made-up constituents
+                    index = query.get('index', ['STUB'])[0]
+                    self._send_json({
+                        "success": True,
+                        "index": index,
+                        "symbols": [f"{index}{i:02d}.NS" for i in range(stub.index_size)]
+                    })
+                    return
+                if url.path != '/api/yahoo-finance':
+                    self.send_error(404)
+                    return
+                stub.requests += 1
+                symbol = query.get('symbol', ['STUB'])[0]
+                timeframe = query.get('timeframe', ['6m'])[0]
+                time.sleep(stub.latency)
+                self._send_json({"success": True, "data": stub_history(symbol, stub.bars, timeframe)})
+
+            def do_POST(self):
+                if urlparse(self.path).path != '/api/yahoo-finance-batch':
+                    self.send_error(404)
+                    return
+                stub.requests += 1
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length) or b'{}')
+                symbols = body.get('symbols', [])
+                # The real batch route fans out in parallel, so it costs one latency
+                time.sleep(stub.latency)
+                data = []
+                for symbol in symbols:
+                    bars = stub_history(symbol, stub.bars, body.get('timeframe', '6m'))
+                    entry = {"symbol": symbol, "regularMarketPrice": bars[-1]["close"]}
+                    if body.get('history'):
+                        entry["history"] = bars
+                    data.append(entry)
+                self._send_json({
+                    "success": True,
+                    "data": data,
+                    "failed": [],
+                    "summary": {"total": len(symbols), "successful": len(data), "failed": 0}
+                })
+
+            def _send_json(self, payload):
+                body = json.dumps(payload).encode()
+                stub.bytes_sent += len(body)
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
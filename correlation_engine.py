@@ -0,0 +1,60 @@
+import numpy as np
+
+
+def pearson_cross(a, b=None):
+    """
+    Pearson correlation of every column of ``a`` with every column of ``b`` in one product
+    Args:
+        a: 2-D array (observations x n)
+        b: 2-D array (observations x m); defaults to ``a``
+    Returns:
+        numpy.ndarray of shape (n, m); 0.0 where either column is constant
+    """
+    a = np.asarray(a, dtype=np.float64)
+    a = a - a.mean(axis=0)
+    norms_a = np.sqrt(np.einsum('ij,ij->j', a, a))
+    if b is None:
+        b, norms_b = a, norms_a
+    else:
+        b = np.asarray(b, dtype=np.float64)
+        b = b - b.mean(axis=0)
+        norms_b = np.sqrt(np.einsum('ij,ij->j', b, b))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        correlations = (a.T @ b) / np.outer(norms_a, norms_b)
+    return np.nan_to_num(correlations, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def correlation_matrices(prices, returns):
+    """
+    Correlation matrices shared by the Granger and Naive Bayes stages
+    Args:
+        prices: 2-D array (observations x symbols) of price levels
+        returns: 2-D array (observations x symbols) of period returns
+    Returns:
+        tuple: (level correlations of shape (symbols, symbols),
+                return-to-label correlations of shape (symbols, symbols)
+                indexed [feature, target], see naive_bayes_engine.label_correlations)
+    """
+    # Imported here: naive_bayes_engine builds on pearson_cross from this module
+    from naive_bayes_engine import label_correlations
+
+    return pearson_cross(prices), label_correlations(returns)
+
+
+def lagged_correlations(series, maxlag):
+    """
+    Correlation of every symbol's past with every symbol's present, for lags 1..maxlag
+    Args:
+        series: 2-D array (observations x symbols), e.g. differenced prices
+        maxlag: highest lag
+    Returns:
+        numpy.ndarray of shape (maxlag, symbols, symbols) where
+        [lag - 1, source, target] correlates source[t - lag] with target[t]
+    """
+    series = np.asarray(series, dtype=np.float64)
+    n_symbols = series.shape[1]
+    correlations = np.zeros((maxlag, n_symbols, n_symbols))
+    for lag in range(1, min(maxlag, len(series) - 2) + 1):
+        correlations[lag - 1] = pearson_cross(series[:-lag], series[lag:])
+    return correlations
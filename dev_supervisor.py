@@ -0,0 +1,60 @@
+import subprocess
+import sys
+import time
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+
+# Events that mean a file's content changed; newer watchdog also reports
+# opened/closed events, which the server child triggers just by importing
+CHANGE_EVENTS = ('created', 'modified', 'moved', 'deleted')
+
+
+class ChangeHandler(FileSystemEventHandler):
+    """Restarts the server on file changes."""
+    def __init__(self, script_name):
+        self.script_name = script_name
+        self.process = None
+        self.start_process()
+
+    def start_process(self):
+        if self.process:
+            self.process.terminate()
+            self.process.wait()
+
+        self.process = subprocess.Popen([sys.executable, self.script_name, '--run-server'],
+                                        stdout=sys.stdout, stderr=sys.stderr)
+        print(f"Started {self.script_name} with PID: {self.process.pid}")
+
+    def on_any_event(self, event):
+        src_path = event.src_path
+        if isinstance(src_path, (bytes, memoryview)):
+            src_path = src_path.tobytes() if isinstance(src_path, memoryview) else src_path
+            src_path = src_path.decode()
+        if event.is_directory or event.event_type not in CHANGE_EVENTS or not str(src_path).endswith('.py'):
+            return
+        print(f"Detected change in {event.src_path}. Restarting server...")
+        self.start_process()
+
+
+def watch(script_to_run):
+    """
+    Run ``script_to_run --run-server`` and restart it whenever a .py file changes.
+
+    This module only needs watchdog, so the supervisor never pays for the
+    analysis imports; the server child loads those itself.
+    """
+    event_handler = ChangeHandler(script_to_run)
+    observer = Observer()
+    observer.schedule(event_handler, '.', recursive=True)
+    observer.start()
+    print(f"👁️ Watching for changes in the current directory to restart {script_to_run}...")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        observer.stop()
+        if event_handler.process:
+            event_handler.process.terminate()
+    observer.join()
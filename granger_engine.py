@@ -0,0 +1,552 @@
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# In-process sweeps with a progress callback report after each of this many target chunks
+PROGRESS_CHUNKS = 20
+
+# Rolling sweeps re-accumulate their cross products from scratch every this many windows
+ROLLING_RESYNC_WINDOWS = 50
+
+# Process pool reused across requests, created on first parallel sweep
+_executor = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def lag_tensor(series, lag):
+    """
+    Build the lagged design block for every symbol at once
+    Args:
+        series: 2-D array (observations x symbols), already differenced
+        lag: number of lags to stack
+    Returns:
+        numpy.ndarray of shape (observations - lag, symbols, lag) where
+        [:, j, k] holds symbol j lagged by k + 1 periods
+    """
+    n_rows = series.shape[0]
+    return np.stack(
+        [series[lag - 1 - k:n_rows - 1 - k] for k in range(lag)],
+        axis=2
+    )
+
+
+def _target_pvalues(series, lags, lag, target, feasible, sources=None):
+    """
+    F-test p-values at one lag for one target against a set of sources
+    Args:
+        series: 2-D differenced array (observations x symbols)
+        lags: lag_tensor(series, lag)
+        lag: lag order being tested
+        target: target column index
+        feasible: boolean mask of columns that can be tested
+        sources: source column indices, all columns when omitted
+    Returns:
+        numpy.ndarray of p-values, one per source (NaN where untestable)
+    """
+    n_obs, n_symbols, _ = lags.shape
+    if sources is None:
+        sources = np.arange(n_symbols)
+        block = lags
+    else:
+        sources = np.asarray(sources, dtype=np.intp)
+        block = lags[:, sources, :]
+    n_sources = len(sources)
+    pvalues = np.full(n_sources, np.nan)
+
+    df_resid = n_obs - (2 * lag + 1)
+    if df_resid <= 0 or n_sources == 0 or not feasible[target]:
+        return pvalues
+
+    y = series[lag:, target]
+    tss = np.sum((y - y.mean()) ** 2)
+    if tss == 0:
+        return pvalues
+
+    # Restricted model: constant + own lags
+    restricted = np.hstack([lags[:, target, :], np.ones((n_obs, 1))])
+    q, _ = np.linalg.qr(restricted)
+    resid_r = y - q @ (q.T @ y)
+    ssr_r = resid_r @ resid_r
+
+    # Partial the restricted design out of every source lag block
+    flat = block.reshape(n_obs, n_sources * lag)
+    z = (flat - q @ (q.T @ flat)).reshape(n_obs, n_sources, lag)
+
+    gram = np.einsum('nsi,nsj->sij', z, z)
+    rhs = np.einsum('nsi,n->si', z, resid_r)
+
+    # The target's own block is fully absorbed; keep it solvable
+    own = sources == target
+    gram[own] = np.eye(lag)
+    rhs[own] = 0.0
+
+    try:
+        beta = np.linalg.solve(gram, rhs[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        beta = np.einsum('sij,sj->si', np.linalg.pinv(gram), rhs)
+
+    resid_u = resid_r[:, None] - np.einsum('nsi,si->ns', z, beta)
+    ssr_u = np.einsum('ns,ns->s', resid_u, resid_u)
+
+    valid = feasible[sources] & ~own & (ssr_u / tss >= np.finfo(float).eps)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f_stat = (ssr_r - ssr_u) / ssr_u / lag * df_resid
+    # scipy is imported on first use so importing this module stays cheap
+    from scipy import stats
+    p = stats.f.sf(f_stat, lag, df_resid)
+    pvalues[valid] = p[valid]
+    return pvalues
+
+
+def granger_ssr_pvalues(series, maxlag, targets=None):
+    """
+    Batched Granger causality F-test for every ordered pair of symbols.
+
+    Reproduces the ``ssr_ftest`` p-value of statsmodels'
+    ``grangercausalitytests`` for each (source, target) pair. For every
+    target the restricted model (constant + own lags) is solved once with a
+    QR factorisation; the source lag blocks of all other symbols are then
+    partialled out against it (Frisch-Waugh-Lovell) and the unrestricted
+    fits for all sources are solved together as a stack of small
+    ``lag x lag`` systems.
+
+    Args:
+        series: 2-D array (observations x symbols), already differenced and
+            free of NaN values
+        maxlag: highest lag to test, lags 1..maxlag are evaluated
+        targets: optional sequence of target column indices to test; all
+            targets are tested when omitted
+    Returns:
+        numpy.ndarray of shape (maxlag, symbols, targets) where
+        [lag - 1, source, k] is the p-value for the k-th requested target;
+        the diagonal and pairs that cannot be tested are NaN
+    """
+    series = np.asarray(series, dtype=np.float64)
+    n_rows, n_symbols = series.shape
+    if targets is None:
+        targets = range(n_symbols)
+    targets = list(targets)
+    pvalues = np.full((maxlag, n_symbols, len(targets)), np.nan)
+
+    # Same guard as statsmodels: too few rows for the highest lag
+    if n_rows <= 3 * maxlag + 1:
+        return pvalues
+
+    # Constant columns make the statsmodels test infeasible
+    feasible = series.max(axis=0) != series.min(axis=0)
+
+    for lag in range(1, maxlag + 1):
+        lags = lag_tensor(series, lag)
+        for column, target in enumerate(targets):
+            pvalues[lag - 1, :, column] = _target_pvalues(series, lags, lag, target, feasible)
+
+    return pvalues
+
+
+def granger_pair_pvalues(series, maxlag, pairs):
+    """
+    Granger F-test p-values for an explicit list of directed pairs.
+
+    Pairs are grouped by target so each target's restricted model is still
+    solved once per lag, however many of its sources are requested.
+    Args:
+        series: 2-D array (observations x symbols), already differenced
+        maxlag: highest lag to test
+        pairs: sequence of (source, target) column index tuples
+    Returns:
+        numpy.ndarray of shape (maxlag, pairs), NaN where untestable
+    """
+    series = np.asarray(series, dtype=np.float64)
+    n_rows = series.shape[0]
+    pvalues = np.full((maxlag, len(pairs)), np.nan)
+    if not len(pairs) or n_rows <= 3 * maxlag + 1:
+        return pvalues
+
+    by_target = {}
+    for index, (source, target) in enumerate(pairs):
+        by_target.setdefault(target, ([], []))
+        by_target[target][0].append(source)
+        by_target[target][1].append(index)
+
+    feasible = series.max(axis=0) != series.min(axis=0)
+
+    for lag in range(1, maxlag + 1):
+        lags = lag_tensor(series, lag)
+        for target, (sources, indices) in by_target.items():
+            pvalues[lag - 1, indices] = _target_pvalues(series, lags, lag, target, feasible, sources)
+
+    return pvalues
+
+
+def _get_executor(workers):
+    """Return the shared process pool, recreating it if the size changed"""
+    global _executor, _executor_workers
+    # Analyses run on several job threads; without the lock two of them could
+    # each create a pool and leak the other's worker processes
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            # Load scipy before the pool forks so workers inherit it already imported
+            from scipy import stats  # noqa: F401
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ProcessPoolExecutor(max_workers=workers)
+            _executor_workers = workers
+        return _executor
+
+
+def _attach_shared(name):
+    """Attach to an existing shared memory block without taking ownership"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 has no track flag; the parent still unlinks the block
+        return shared_memory.SharedMemory(name=name)
+
+
+def _granger_shard(shm_name, shape, maxlag, targets):
+    """Worker entry point: run the batched test for one shard of targets"""
+    started = time.perf_counter()
+    shm = _attach_shared(shm_name)
+    try:
+        pvalues = granger_ssr_pvalues(
+            np.ndarray(shape, dtype=np.float64, buffer=shm.buf), maxlag, targets
+        )
+    finally:
+        shm.close()
+    return pvalues, time.perf_counter() - started
+
+
+@contextmanager
+def _shared_series(series):
+    """Copy a float64 panel into a new shared memory block; yields the block's name"""
+    shm = shared_memory.SharedMemory(create=True, size=max(series.nbytes, 1))
+    try:
+        shared = np.ndarray(series.shape, dtype=np.float64, buffer=shm.buf)
+        shared[:] = series
+        del shared
+        yield shm.name
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _granger_pair_shard(shm_name, shape, maxlag, pairs):
+    """Worker entry point: run the pair-list test for one shard of pairs"""
+    started = time.perf_counter()
+    shm = _attach_shared(shm_name)
+    try:
+        pvalues = granger_pair_pvalues(
+            np.ndarray(shape, dtype=np.float64, buffer=shm.buf), maxlag, pairs
+        )
+    finally:
+        shm.close()
+    return pvalues, time.perf_counter() - started
+
+
+def parallel_granger_ssr_pvalues(series, maxlag, workers, progress=None, on_targets=None):
+    """
+    Shard ``granger_ssr_pvalues`` across a process pool by target symbol.
+
+    The differenced panel is copied once into shared memory and every worker
+    maps it read-only, so only the shard's target indices are pickled per
+    task. Shards are contiguous target ranges and are reassembled in order,
+    so the result is identical to the serial call.
+
+    Args:
+        series: 2-D array (observations x symbols), already differenced
+        maxlag: highest lag to test
+        workers: number of worker processes; 1 or fewer runs in-process
+        progress: optional callback(pairs_done, pairs_total), called as
+            target chunks (in-process) or shards (parallel) complete
+        on_targets: optional callback(targets, pvalues) called with each
+            completed chunk or shard's target indices and its p-values of
+            shape (maxlag, symbols, len(targets))
+    Returns:
+        tuple: (p-value array of shape (maxlag, symbols, symbols),
+                list of per-shard timing dicts)
+    """
+    series = np.ascontiguousarray(series, dtype=np.float64)
+    n_symbols = series.shape[1]
+    total_pairs = n_symbols * (n_symbols - 1)
+    if progress is not None:
+        progress(0, total_pairs)
+
+    if workers <= 1 or n_symbols < 2:
+        started = time.perf_counter()
+        if progress is None and on_targets is None:
+            pvalues = granger_ssr_pvalues(series, maxlag)
+        else:
+            # Run in target chunks so results can be reported between them
+            pvalues = np.full((maxlag, n_symbols, n_symbols), np.nan)
+            for chunk in np.array_split(np.arange(n_symbols), min(PROGRESS_CHUNKS, max(n_symbols, 1))):
+                chunk = chunk.tolist()
+                pvalues[:, :, chunk] = granger_ssr_pvalues(series, maxlag, chunk)
+                if on_targets is not None:
+                    on_targets(chunk, pvalues[:, :, chunk])
+                if progress is not None:
+                    progress((chunk[-1] + 1) * (n_symbols - 1), total_pairs)
+        return pvalues, [{
+            "shard": 0,
+            "targets": n_symbols,
+            "pairs": n_symbols * (n_symbols - 1),
+            "seconds": round(time.perf_counter() - started, 4)
+        }]
+
+    shards = [
+        shard.tolist()
+        for shard in np.array_split(np.arange(n_symbols), min(workers, n_symbols))
+    ]
+
+    with _shared_series(series) as shm_name:
+        executor = _get_executor(workers)
+        futures = [
+            executor.submit(_granger_shard, shm_name, series.shape, maxlag, shard)
+            for shard in shards
+        ]
+
+        pvalues = np.full((maxlag, n_symbols, n_symbols), np.nan)
+        shard_timings = []
+        shard_index = {future: index for index, future in enumerate(futures)}
+        pairs_done = 0
+        for future in as_completed(futures):
+            index = shard_index[future]
+            shard = shards[index]
+            shard_pvalues, elapsed = future.result()
+            pvalues[:, :, shard] = shard_pvalues
+            if on_targets is not None:
+                on_targets(shard, shard_pvalues)
+            pairs_done += len(shard) * (n_symbols - 1)
+            if progress is not None:
+                progress(pairs_done, total_pairs)
+            shard_timings.append({
+                "shard": index,
+                "targets": len(shard),
+                "pairs": len(shard) * (n_symbols - 1),
+                "seconds": round(elapsed, 4)
+            })
+        shard_timings.sort(key=lambda timing: timing["shard"])
+
+    return pvalues, shard_timings
+
+
+def parallel_granger_pair_pvalues(series, maxlag, pairs, workers, progress=None, on_pairs=None):
+    """
+    Shard ``granger_pair_pvalues`` across the process pool.
+
+    The pair-list counterpart of ``parallel_granger_ssr_pvalues``, for sweeps
+    that test only some pairs (cache misses left after screening). Pairs are
+    ordered by target and split into shards of near-equal size, so a
+    target's restricted model is solved in one shard (two at a boundary).
+    Args:
+        series: 2-D array (observations x symbols), already differenced
+        maxlag: highest lag to test
+        pairs: sequence of (source, target) column index tuples
+        workers: number of worker processes; 1 or fewer runs in-process
+        progress: optional callback(pairs_done, pairs_total), called as
+            chunks (in-process) or shards (parallel) complete
+        on_pairs: optional callback(indices, pvalues) called with each
+            completed chunk or shard's positions in ``pairs`` and its
+            p-values of shape (maxlag, len(indices))
+    Returns:
+        tuple: (p-value array of shape (maxlag, pairs), list of per-shard timing dicts)
+    """
+    series = np.ascontiguousarray(series, dtype=np.float64)
+    pairs = [tuple(pair) for pair in pairs]
+    total_pairs = len(pairs)
+    if progress is not None:
+        progress(0, total_pairs)
+
+    pvalues = np.full((maxlag, total_pairs), np.nan)
+    order = sorted(range(total_pairs), key=lambda index: pairs[index][1])
+    if workers <= 1:
+        n_chunks = 1 if progress is None and on_pairs is None else PROGRESS_CHUNKS
+    else:
+        n_chunks = workers
+    shards = [
+        shard.tolist() for shard in np.array_split(np.array(order, dtype=int), min(n_chunks, max(total_pairs, 1)))
+        if len(shard)
+    ]
+
+    def record(index, shard, shard_pvalues, elapsed, pairs_done):
+        pvalues[:, shard] = shard_pvalues
+        if on_pairs is not None:
+            on_pairs(shard, shard_pvalues)
+        if progress is not None:
+            progress(pairs_done, total_pairs)
+        return {
+            "shard": index,
+            "targets": len({pairs[k][1] for k in shard}),
+            "pairs": len(shard),
+            "seconds": round(elapsed, 4)
+        }
+
+    shard_timings = []
+    pairs_done = 0
+    if workers <= 1 or len(shards) < 2:
+        for index, shard in enumerate(shards):
+            started = time.perf_counter()
+            shard_pvalues = granger_pair_pvalues(series, maxlag, [pairs[k] for k in shard])
+            pairs_done += len(shard)
+            shard_timings.append(
+                record(index, shard, shard_pvalues, time.perf_counter() - started, pairs_done)
+            )
+        return pvalues, shard_timings
+
+    with _shared_series(series) as shm_name:
+        executor = _get_executor(workers)
+        futures = {
+            executor.submit(_granger_pair_shard, shm_name, series.shape, maxlag, [pairs[k] for k in shard]): index
+            for index, shard in enumerate(shards)
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            shard_pvalues, elapsed = future.result()
+            pairs_done += len(shards[index])
+            shard_timings.append(record(index, shards[index], shard_pvalues, elapsed, pairs_done))
+        shard_timings.sort(key=lambda timing: timing["shard"])
+
+    return pvalues, shard_timings
+
+
+def _window_pvalues(gram, xty, yty, blocks, lag, n_obs, feasible, stats):
+    """
+    F-test p-values for every ordered pair from one window's cross products
+    Args:
+        gram: X'X of the joint design [1, lags of every symbol] over the window
+        xty: X'Y, one column per target
+        yty: per-target sum of squares of the response
+        blocks: (symbols, lag) column indices of each symbol's lag block in X
+        lag: lag order being tested
+        n_obs: regression rows in the window
+        feasible: boolean mask of symbols that are not constant in the window
+        stats: scipy.stats module
+    Returns:
+        numpy.ndarray of shape (symbols, symbols) indexed [source, target]
+    """
+    n_symbols = blocks.shape[0]
+    df_resid = n_obs - (2 * lag + 1)
+    targets = np.arange(n_symbols)
+    constant = np.zeros((n_symbols, 1), dtype=np.intp)
+
+    # Restricted model per target: constant + own lags
+    restricted = np.hstack([constant, blocks])
+    gram_r = gram[restricted[:, :, None], restricted[:, None, :]]
+    rhs_r = xty[restricted, targets[:, None]]
+    try:
+        beta_r = np.linalg.solve(gram_r, rhs_r[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        beta_r = np.einsum('tij,tj->ti', np.linalg.pinv(gram_r), rhs_r)
+    ssr_r = yty - np.einsum('ti,ti->t', rhs_r, beta_r)
+
+    # Unrestricted model per (source, target): partial the restricted columns
+    # out of the source block (Frisch-Waugh-Lovell on the cross products), so
+    # only a lag x lag system is left per pair
+    cross = gram[blocks[:, None, :, None], restricted[None, :, None, :]]  # (source, target, lag, lag + 1)
+    try:
+        inverse_r = np.linalg.inv(gram_r)
+    except np.linalg.LinAlgError:
+        inverse_r = np.linalg.pinv(gram_r)
+    projected = cross @ inverse_r[None]
+    gram_u = gram[blocks[:, :, None], blocks[:, None, :]][:, None] - projected @ np.swapaxes(cross, -1, -2)
+    rhs_u = xty[blocks[:, None, :], targets[None, :, None]] - (projected @ rhs_r[None, :, :, None])[..., 0]
+
+    # A symbol's own block is fully absorbed by the restricted model; keep it solvable
+    own = np.eye(n_symbols, dtype=bool)
+    gram_u[own] = np.eye(lag)
+    rhs_u[own] = 0.0
+    try:
+        beta_u = np.linalg.solve(gram_u, rhs_u[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        beta_u = np.einsum('stij,stj->sti', np.linalg.pinv(gram_u), rhs_u)
+    ssr_u = ssr_r[None, :] - np.einsum('sti,sti->st', rhs_u, beta_u)
+
+    tss = yty - xty[0] ** 2 / n_obs
+    with np.errstate(divide='ignore', invalid='ignore'):
+        valid = (
+            feasible[:, None] & feasible[None, :] & ~own
+            & (tss[None, :] > 0)
+            & (ssr_u / tss[None, :] >= np.finfo(float).eps)
+        )
+        f_stat = (ssr_r[None, :] - ssr_u) / ssr_u / lag * df_resid
+
+    pvalues = np.full((n_symbols, n_symbols), np.nan)
+    pvalues[valid] = stats.f.sf(f_stat[valid], lag, df_resid)
+    return pvalues
+
+
+def rolling_granger_ssr_pvalues(series, maxlag, window, step=1):
+    """
+    Granger F-test p-values for every ordered pair over a sliding window.
+
+    Each lag's regressions share one joint design (constant plus every
+    symbol's lags), so a window only needs that design's cross products.
+    They are slid forward with rank-one updates, adding the rows entering
+    the window and removing the rows leaving it, instead of refitting;
+    every pair's restricted and unrestricted fits are then solved from
+    sub-blocks of those cross products. Each window matches
+    ``granger_ssr_pvalues(series[start:start + window], maxlag)``.
+    Args:
+        series: 2-D array (observations x symbols), already differenced
+        maxlag: highest lag to test
+        window: observations per window
+        step: observations the window advances between evaluations
+    Returns:
+        tuple: (p-value array of shape (windows, maxlag, symbols, symbols)
+                indexed [window, lag - 1, source, target],
+                array of window end positions (exclusive) in ``series``)
+    """
+    series = np.asarray(series, dtype=np.float64)
+    n_rows, n_symbols = series.shape
+    starts = np.arange(0, max(n_rows - window + 1, 0), step)
+    pvalues = np.full((len(starts), maxlag, n_symbols, n_symbols), np.nan)
+
+    # Same guard as granger_ssr_pvalues for each window
+    if len(starts) == 0 or window <= 3 * maxlag + 1:
+        return pvalues, starts + window
+
+    from scipy import stats
+
+    windows = np.lib.stride_tricks.sliding_window_view(series, window, axis=0)[starts]
+    feasible = windows.max(axis=2) != windows.min(axis=2)
+
+    for lag in range(1, maxlag + 1):
+        n_obs = window - lag
+        # Row r of the design is observation r + lag; window `start` uses rows [start, start + n_obs)
+        design = np.hstack([
+            np.ones((n_rows - lag, 1)),
+            lag_tensor(series, lag).reshape(n_rows - lag, n_symbols * lag)
+        ])
+        response = series[lag:]
+        blocks = 1 + np.arange(n_symbols)[:, None] * lag + np.arange(lag)
+
+        previous = None
+        for w, start in enumerate(starts):
+            if previous is None or start - previous >= n_obs or w % ROLLING_RESYNC_WINDOWS == 0:
+                # Accumulate from scratch (first window, large steps, and
+                # periodically to stop rounding errors from building up)
+                rows, ys = design[start:start + n_obs], response[start:start + n_obs]
+                gram = rows.T @ rows
+                xty = rows.T @ ys
+                yty = np.einsum('ij,ij->j', ys, ys)
+            else:
+                added = slice(previous + n_obs, start + n_obs)
+                removed = slice(previous, start)
+                gram += design[added].T @ design[added] - design[removed].T @ design[removed]
+                xty += design[added].T @ response[added] - design[removed].T @ response[removed]
+                yty += (
+                    np.einsum('ij,ij->j', response[added], response[added])
+                    - np.einsum('ij,ij->j', response[removed], response[removed])
+                )
+            previous = start
+
+            pvalues[w, lag - 1] = _window_pvalues(
+                gram, xty, yty, blocks, lag, n_obs, feasible[w], stats
+            )
+
+    return pvalues, starts + window
@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+from urllib.parse import quote
+
+import numpy as np
+
+# One record per trading day; dates are stored at day resolution
+HISTORY_DTYPE = np.dtype([('date', 'datetime64[D]'), ('close', 'f8')])
+
+
+def merge_tail(stored, dates, closes):
+    """
+    Merge a fetched tail into a history array (see HistoryStore.append)
+    Returns:
+        structured numpy array holding the merged history (a new array)
+    """
+    tail = np.empty(len(dates), dtype=HISTORY_DTYPE)
+    tail['date'] = np.asarray(dates, dtype='datetime64[D]')
+    tail['close'] = np.asarray(closes, dtype='f8')
+    tail = tail[np.argsort(tail['date'], kind='stable')]
+    if not len(tail):
+        return np.array(stored)
+    return np.concatenate([stored[stored['date'] < tail['date'][0]], tail])
+
+
+class HistoryStore:
+    """
+    On-disk daily close history, one memory-mapped .npy file per symbol.
+
+    Files hold a sorted structured array of (date, close) records. Reads map
+    the file read-only; appends merge the new tail into the stored series and
+    atomically replace the file, so concurrent readers never see a partial
+    write.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, symbol):
+        """File path for a symbol (percent-encoded so any ticker is a valid name)"""
+        return os.path.join(self.root, quote(symbol, safe='') + '.npy')
+
+    def load(self, symbol, mmap=True):
+        """
+        Load the stored history for a symbol
+        Args:
+            symbol: Ticker symbol
+            mmap: Map the file read-only; pass False for an in-memory copy when
+                the file may be replaced while the result is held (Windows
+                refuses to replace a mapped file)
+        Returns:
+            structured numpy array with 'date' and 'close' fields (empty if unknown)
+        """
+        try:
+            return np.load(self.path(symbol), mmap_mode='r' if mmap else None)
+        except (FileNotFoundError, ValueError, OSError):
+            return np.empty(0, dtype=HISTORY_DTYPE)
+
+    def age(self, symbol):
+        """Seconds since the symbol's history was last written, or None if never"""
+        try:
+            return time.time() - os.path.getmtime(self.path(symbol))
+        except OSError:
+            return None
+
+    def append(self, symbol, dates, closes):
+        """
+        Merge a freshly fetched tail into the stored history.
+
+        Rows on or after the first new date are replaced by the new rows, so
+        a re-fetched (possibly still moving) last bar overwrites the old one.
+        Args:
+            symbol: Ticker symbol
+            dates: Array-like of dates (anything numpy converts to datetime64[D])
+            closes: Array-like of closing prices, same length as dates
+        Returns:
+            structured numpy array holding the merged history
+        """
+        with self._lock:
+            stored = self.load(symbol)
+            merged = merge_tail(stored, dates, closes)
+            # Release the read-only mapping before replacing the file
+            del stored
+
+            tmp_path = f"{self.path(symbol)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as handle:
+                np.save(handle, merged)
+            os.replace(tmp_path, self.path(symbol))
+
+        return merged
+
+    def clear(self):
+        """Remove every stored history file"""
+        removed = 0
+        with self._lock:
+            for name in os.listdir(self.root):
+                if name.endswith('.npy'):
+                    os.remove(os.path.join(self.root, name))
+                    removed += 1
+        return removed
@@ -0,0 +1,92 @@
+import heapq
+
+import numpy as np
+
+
+def edge_strength(edge):
+    """Ranking key of an edge: absolute correlation, falling back to its value"""
+    return abs(edge.get('correlation', edge.get('value', 0)))
+
+
+class TopKGraphBuilder:
+    """
+    Keeps the strongest influence edges of a sweep in bounded heaps.
+
+    The global heap holds the ``top_k`` strongest edges with at most one edge
+    per unordered stock pair; when both directions (or both methods) of a
+    pair are significant the stronger edge wins, and ties go to the edge
+    added first. That is the same result as stable-sorting every edge by
+    strength, dropping repeated pairs and keeping the first ``top_k``.
+    Per-node heaps keep each source's ``node_k`` strongest outgoing edges
+    for the sparse adjacency. Memory is O(top_k + nodes * node_k) however
+    many edges are added.
+    """
+
+    def __init__(self, symbols, top_k=20, node_k=5):
+        self.symbols = list(symbols)
+        self.top_k = top_k
+        self.node_k = node_k
+        self.added = 0
+        self._index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._top = []         # min-heap of (strength, -seq, pair, edge)
+        self._top_pairs = {}   # pair -> its entry in self._top
+        self._nodes = [[] for _ in self.symbols]  # per source: min-heap of (strength, -seq, target, edge)
+
+    def add(self, edge):
+        """Offer one edge (dict with source, target, value, method, correlation)"""
+        key = (edge_strength(edge), -self.added)
+        self.added += 1
+        source, target = edge['source'], edge['target']
+
+        # Global top-k, one edge per unordered pair
+        pair = (source, target) if source < target else (target, source)
+        entry = (*key, pair, edge)
+        existing = self._top_pairs.get(pair)
+        if existing is not None:
+            if key > existing[:2]:
+                self._top[self._top.index(existing)] = entry
+                heapq.heapify(self._top)
+                self._top_pairs[pair] = entry
+        elif len(self._top) < self.top_k:
+            heapq.heappush(self._top, entry)
+            self._top_pairs[pair] = entry
+        elif self._top and key > self._top[0][:2]:
+            # A pair evicted earlier can only come back with a stronger edge,
+            # since the heap minimum never decreases
+            evicted = heapq.heapreplace(self._top, entry)
+            del self._top_pairs[evicted[2]]
+            self._top_pairs[pair] = entry
+
+        # Per-node top-k of outgoing edges
+        node = self._nodes[self._index[source]]
+        node_entry = (*key, self._index[target], edge)
+        if len(node) < self.node_k:
+            heapq.heappush(node, node_entry)
+        elif node and key > node[0][:2]:
+            heapq.heapreplace(node, node_entry)
+
+    def top_edges(self):
+        """Global top-k edges, strongest first"""
+        return [entry[3] for entry in sorted(self._top, reverse=True)]
+
+    def to_csr(self):
+        """
+        Per-node top-k adjacency as JSON-ready CSR arrays
+        Returns:
+            dict: row i lists source ``nodes[i]``'s strongest outgoing edges as
+                  ``indices[indptr[i]:indptr[i + 1]]`` (target node indices)
+                  with matching ``values``, ``correlations`` and ``methods``
+        """
+        rows = [sorted(node, reverse=True) for node in self._nodes]
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(row) for row in rows])
+        entries = [entry for row in rows for entry in row]
+        return {
+            "format": "csr",
+            "nodes": self.symbols,
+            "indptr": indptr.tolist(),
+            "indices": [entry[2] for entry in entries],
+            "values": [entry[3]['value'] for entry in entries],
+            "correlations": [entry[3].get('correlation', 0) for entry in entries],
+            "methods": [entry[3].get('method', 'unknown') for entry in entries]
+        }
@@ -0,0 +1,67 @@
+import numpy as np
+
+from correlation_engine import pearson_cross
+
+# Fewest samples, and fewest samples per class, a target needs to be scored
+MIN_SAMPLES = 10
+MIN_CLASS_SAMPLES = 2
+
+
+def up_labels(returns):
+    """
+    Next-period direction labels for every symbol
+    Args:
+        returns: 2-D array (observations x symbols) of period returns
+    Returns:
+        tuple: (features, labels) aligned row by row; features are the returns
+               without the last row and labels[t, j] is 1.0 if symbol j rose
+               in period t + 1
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    return returns[:-1], (returns[1:] > 0).astype(np.float64)
+
+
+def class_mean_differences(returns):
+    """
+    Gaussian Naive Bayes influence scores for every (feature, target) pair at once.
+
+    For a target's up/down label, GaussianNB's ``theta_[1] - theta_[0]`` is
+    the mean feature return before up periods minus the mean before down
+    periods. Both class sums for all targets come from one matrix product,
+    so no per-target model has to be fitted.
+    Args:
+        returns: 2-D array (observations x symbols) of period returns
+    Returns:
+        tuple: (differences of shape (symbols, symbols) indexed [feature, target],
+                boolean array marking targets with enough samples in both classes)
+    """
+    features, labels = up_labels(returns)
+    n_samples, n_symbols = labels.shape
+
+    up_counts = labels.sum(axis=0)
+    down_counts = n_samples - up_counts
+    scorable = (
+        (n_samples >= MIN_SAMPLES)
+        & (up_counts >= MIN_CLASS_SAMPLES)
+        & (down_counts >= MIN_CLASS_SAMPLES)
+    )
+
+    up_sums = features.T @ labels  # (feature, target) sum over up periods
+    down_sums = features.sum(axis=0)[:, None] - up_sums
+    with np.errstate(divide='ignore', invalid='ignore'):
+        differences = up_sums / up_counts - down_sums / down_counts
+    differences[:, ~scorable] = np.nan
+    return differences, scorable
+
+
+def label_correlations(returns):
+    """
+    Pearson correlation of every symbol's return with every symbol's next-period up label
+    Args:
+        returns: 2-D array (observations x symbols) of period returns
+    Returns:
+        numpy.ndarray of shape (symbols, symbols) indexed [feature, target];
+        0.0 where either series is constant
+    """
+    features, labels = up_labels(returns)
+    return pearson_cross(features, labels)
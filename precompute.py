@@ -0,0 +1,187 @@
+import datetime
+import threading
+import time
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from analysis_logging import get_logger
+
+logger = get_logger('precompute')
+
+
+def parse_time_of_day(value):
+    """Parse 'HH:MM' into a datetime.time"""
+    hours, minutes = value.strip().split(':')
+    return datetime.time(int(hours), int(minutes))
+
+
+def load_timezone(name):
+    """ZoneInfo for name, with a hint when the system has no time zone database"""
+    try:
+        return ZoneInfo(name)
+    except ZoneInfoNotFoundError as e:
+        raise ZoneInfoNotFoundError(
+            f"No time zone data for {name!r}; install the tzdata package (pip install tzdata)"
+        ) from e
+
+
+def last_daily_run(now, at):
+    """Most recent occurrence of time-of-day ``at`` at or before ``now`` (aware datetimes)"""
+    scheduled = now.replace(hour=at.hour, minute=at.minute, second=0, microsecond=0)
+    if scheduled > now:
+        scheduled -= datetime.timedelta(days=1)
+    return scheduled
+
+
+class PopularSymbolSets:
+    """
+    Counts analysis requests per symbol set so the most requested sets can be warmed.
+
+    The latest request body of each set is kept as well, since synthetic
+    fallback prices are derived from it. At most ``max_sets`` sets are
+    tracked; when full, the least requested set is forgotten.
+    """
+
+    def __init__(self, max_sets=256):
+        self.max_sets = max_sets
+        self._sets = {}  # sorted symbol tuple -> [count, last_requested, stock_prices]
+        self._lock = threading.Lock()
+
+    def record(self, stock_prices):
+        key = tuple(sorted(stock_prices))
+        with self._lock:
+            entry = self._sets.get(key)
+            if entry is None:
+                if len(self._sets) >= self.max_sets:
+                    del self._sets[min(self._sets, key=lambda k: (self._sets[k][0], self._sets[k][1]))]
+                entry = self._sets[key] = [0, 0.0, None]
+            entry[0] += 1
+            entry[1] = time.time()
+            entry[2] = dict(stock_prices)
+
+    def top(self, n, min_requests=1, lookback_seconds=None):
+        """
+        The n most requested sets
+        Args:
+            n: Number of sets
+            min_requests: Sets requested fewer times are skipped
+            lookback_seconds: Skip sets not requested within this many seconds
+        Returns:
+            list: Request bodies ({symbol: price data}), most requested first
+        """
+        cutoff = time.time() - lookback_seconds if lookback_seconds else 0
+        with self._lock:
+            ranked = sorted(
+                (entry for entry in self._sets.values() if entry[0] >= min_requests and entry[1] >= cutoff),
+                key=lambda entry: (entry[0], entry[1]),
+                reverse=True
+            )
+            return [entry[2] for entry in ranked[:n]]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "tracked_sets": len(self._sets),
+                "requests": sum(entry[0] for entry in self._sets.values())
+            }
+
+
+class PrecomputeScheduler:
+    """
+    Runs precompute tasks on a daemon thread, daily at a fixed wall-clock time
+    or every ``interval`` seconds.
+
+    Each task is called as ``run(due_at)`` with the epoch seconds of the
+    occurrence it is due for. Daily tasks are called once at start for the
+    most recent occurrence, so a server started after the scheduled time
+    catches up instead of waiting a day; tasks are expected to return early
+    when their stored result is already newer than ``due_at``. Interval
+    tasks first run one interval after start. The time zone is only looked
+    up once a daily task needs it, so interval-only schedulers run without
+    time zone data.
+    """
+
+    def __init__(self, run_at='16:00', timezone='Asia/Kolkata'):
+        self.run_at = parse_time_of_day(run_at)
+        self.timezone_name = timezone
+        self._timezone = None
+        self._tasks = {}
+        self._state = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def timezone(self):
+        if self._timezone is None:
+            self._timezone = load_timezone(self.timezone_name)
+        return self._timezone
+
+    def add_task(self, name, run, interval=None):
+        """Register ``run(due_at)`` under name, daily at run_at or every ``interval`` seconds"""
+        self._tasks[name] = (run, interval)
+        self._state[name] = {
+            "schedule": f"every {interval}s" if interval else f"daily at {self.run_at.strftime('%H:%M')}",
+            "next_run": None, "last_run": None, "last_duration": None, "last_error": None, "runs": 0
+        }
+
+    def start(self):
+        """Start the scheduler thread (no-op if it is running or there are no tasks)"""
+        if self._thread is not None or not self._tasks:
+            return
+        now = time.time()
+        for name, (run, interval) in self._tasks.items():
+            if interval:
+                self._state[name]["next_run"] = now + interval
+            else:
+                self._state[name]["next_run"] = last_daily_run(
+                    datetime.datetime.now(self.timezone), self.run_at
+                ).timestamp()
+        self._thread = threading.Thread(target=self._loop, name='precompute', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def next_daily_run(self):
+        """Epoch seconds of the next daily occurrence"""
+        now = datetime.datetime.now(self.timezone)
+        return (last_daily_run(now, self.run_at) + datetime.timedelta(days=1)).timestamp()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            for name, (run, interval) in self._tasks.items():
+                due_at = self._state[name]["next_run"]
+                if due_at <= time.time():
+                    self._run_task(name, run, due_at)
+                    with self._lock:
+                        self._state[name]["next_run"] = (
+                            time.time() + interval if interval else self.next_daily_run()
+                        )
+            wake_at = min(state["next_run"] for state in self._state.values())
+            # Sleep in short slices so a stop request is noticed promptly
+            self._stop.wait(min(60, max(wake_at - time.time(), 0)))
+
+    def _run_task(self, name, run, due_at):
+        """Run one task; a failing task does not stop the others"""
+        started = time.time()
+        error = None
+        try:
+            run(due_at)
+        except Exception as e:
+            error = str(e)
+            logger.exception("Precompute task %s failed", name)
+        with self._lock:
+            state = self._state[name]
+            state["last_run"] = started
+            state["last_duration"] = round(time.time() - started, 3)
+            state["last_error"] = error
+            state["runs"] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "run_at": self.run_at.strftime('%H:%M'),
+                "timezone": self.timezone_name,
+                "running": self._thread is not None and self._thread.is_alive(),
+                "tasks": {name: dict(state) for name, state in self._state.items()}
+            }
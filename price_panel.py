@@ -0,0 +1,115 @@
+import numpy as np
+
+
+class PricePanel:
+    """
+    Closing prices of many symbols on shared trading dates.
+
+    ``values`` is one C-contiguous (dates x symbols) matrix, float64 or
+    float32, with ``symbols`` naming its columns and ``dates`` (datetime64[D])
+    its rows. The fetch layer builds a panel once per request and the
+    analysis stages read the matrix and the arrays derived from it directly,
+    so no DataFrame is built on the request path.
+    """
+
+    def __init__(self, values, symbols, dates):
+        self.values = np.ascontiguousarray(values)
+        self.symbols = list(symbols)
+        self.dates = np.asarray(dates, dtype='datetime64[D]')
+        if self.values.shape != (len(self.dates), len(self.symbols)):
+            raise ValueError(
+                f"Panel values of shape {self.values.shape} do not match "
+                f"{len(self.dates)} dates x {len(self.symbols)} symbols"
+            )
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def empty(self):
+        return self.values.size == 0
+
+    def __len__(self):
+        return len(self.dates)
+
+    def diffs(self):
+        """First differences, one row shorter (row t is values[t + 1] - values[t])"""
+        return np.diff(self.values, axis=0)
+
+    def returns(self):
+        """Period returns, one row shorter; same formula as DataFrame.pct_change"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.values[1:] / self.values[:-1] - 1
+
+    def select(self, symbols):
+        """Panel of the given columns, in the given order"""
+        index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        columns = [index[symbol] for symbol in symbols]
+        return PricePanel(self.values[:, columns], symbols, self.dates)
+
+    def date_strings(self):
+        """Row dates as 'YYYY-MM-DD' strings"""
+        return np.datetime_as_string(self.dates, unit='D')
+
+    def to_frame(self):
+        """pandas DataFrame view of the panel, for inspection and notebooks"""
+        import pandas as pd
+        return pd.DataFrame(self.values, index=pd.DatetimeIndex(self.dates), columns=self.symbols, copy=False)
+
+
+def align_closes(histories, min_days=50, dtype=np.float64):
+    """
+    Align per-symbol closes on their actual trading dates.
+
+    The series are outer-joined on date, so a day any symbol traded is a
+    row and weekends and holidays are not; a symbol missing a day (e.g. a
+    suspension or a different exchange holiday) carries its last close
+    forward. Rows before every symbol has started trading are dropped. If a
+    late-starting symbol would leave fewer than min_days rows it is left out
+    instead, latest starter first.
+    Args:
+        histories: {symbol: (dates, closing prices)}
+        min_days: Fewest rows the aligned panel should keep
+        dtype: Panel value type, np.float64 or np.float32
+    Returns:
+        tuple: (PricePanel of the kept symbols, list of symbols left out)
+    """
+    series = {}
+    for symbol, (dates, closes) in histories.items():
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        closes = np.asarray(closes, dtype=np.float64)
+        # Sorted by date, the last close of any repeated date wins
+        order = np.argsort(dates, kind='stable')
+        dates, closes = dates[order], closes[order]
+        keep = np.append(dates[1:] != dates[:-1], True)
+        if keep.any():
+            series[symbol] = (dates[keep], closes[keep])
+    if not series:
+        return PricePanel(np.empty((0, 0), dtype=dtype), [], []), []
+
+    all_dates = np.unique(np.concatenate([dates for dates, _ in series.values()]))
+    first_dates = {symbol: dates[0] for symbol, (dates, _) in series.items()}
+    left_out = []
+    for symbol in sorted(first_dates, key=first_dates.get, reverse=True)[:-1]:
+        if np.count_nonzero(all_dates >= first_dates[symbol]) >= min_days:
+            break
+        left_out.append(symbol)
+        del series[symbol]
+
+    symbols = list(series)
+    trading_dates = np.unique(np.concatenate([dates for dates, _ in series.values()]))
+
+    # Scatter every series onto the shared dates, then forward-fill gaps by
+    # carrying the row index of each column's last observation
+    values = np.full((len(trading_dates), len(symbols)), np.nan, dtype=dtype)
+    for column, symbol in enumerate(symbols):
+        dates, closes = series[symbol]
+        values[np.searchsorted(trading_dates, dates), column] = closes
+    last_rows = np.where(~np.isnan(values), np.arange(len(trading_dates))[:, None], 0)
+    np.maximum.accumulate(last_rows, axis=0, out=last_rows)
+
+    # Start on the first date every kept symbol has traded by
+    start = np.searchsorted(trading_dates, max(dates[0] for dates, _ in series.values()))
+    values = values[last_rows[start:], np.arange(len(symbols))]
+    return PricePanel(values, symbols, trading_dates[start:]), left_out
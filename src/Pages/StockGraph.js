@@ -30,6 +30,26 @@ if (typeof window !== 'undefined') {
   initCytoscape()
 }
 
+// How often to poll a queued correlation analysis job
+const JOB_POLL_INTERVAL_MS = 1000
+
+// Edges drawn while an analysis is still streaming
+const PROVISIONAL_EDGE_LIMIT = 20
+
+// Strongest edge per stock pair, same ordering the backend uses for its final graph
+const strongestEdges = (edges, limit = PROVISIONAL_EDGE_LIMIT) => {
+  const seen = new Set()
+  return [...edges]
+    .sort((a, b) => Math.abs(b.correlation ?? b.value ?? 0) - Math.abs(a.correlation ?? a.value ?? 0))
+    .filter(edge => {
+      const pair = [edge.source, edge.target].sort().join('|')
+      if (seen.has(pair)) return false
+      seen.add(pair)
+      return true
+    })
+    .slice(0, limit)
+}
+
 const StockGraph = () => {
   const { user } = useAuth()
   const [watchlistData, setWatchlistData] = useState([])
@@ -49,6 +69,7 @@ const StockGraph = () => {
   const [aiAnalysis, setAiAnalysis] = useState(null)
   const [loadingAiAnalysis, setLoadingAiAnalysis] = useState(false)
   const [showAiAnalysis, setShowAiAnalysis] = useState(false)
+  const [analysisProgress, setAnalysisProgress] = useState(null)
   
   // Add refs to track if we should regenerate the graph
   const graphGeneratedRef = useRef(false)
@@ -103,18 +124,96 @@ const StockGraph = () => {
     return prices
   }, [])
 
+  // Queue the analysis as a backend job and poll until it finishes, so large
+  // symbol sets don't hold one request open until it times out
+  const runCorrelationJob = useCallback(async (prices) => {
+    const submitResponse = await backendFetch('/api/granger-causality/jobs', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ stock_prices: prices })
+    })
+    const job = await submitResponse.json()
+    if (!job.success) {
+      throw new Error(job.message || 'Failed to queue correlation analysis')
+    }
+
+    while (true) {
+      await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS))
+      const statusResponse = await backendFetch(`/api/granger-causality/jobs/${job.job_id}`)
+      const status = await statusResponse.json()
+      setAnalysisProgress(status.progress || null)
+
+      if (status.status === 'done') {
+        return status.result
+      }
+      if (status.status === 'failed' || !status.success) {
+        throw new Error(status.error || status.message || 'Correlation analysis failed')
+      }
+    }
+  }, [])
+
+  // Stream the analysis so edges are drawn as soon as the backend finds them;
+  // the final message replaces them with the deduplicated top-20 graph
+  const runCorrelationStream = useCallback(async (prices) => {
+    const response = await backendFetch('/api/granger-causality/stream', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ stock_prices: prices })
+    })
+    if (!response.body) {
+      // No streaming body support: fall back to the job API
+      return runCorrelationJob(prices)
+    }
+
+    const reader = response.body.getReader()
+    const decoder = new TextDecoder()
+    const streamedEdges = []
+    let buffer = ''
+
+    while (true) {
+      const { done, value } = await reader.read()
+      if (done) break
+
+      buffer += decoder.decode(value, { stream: true })
+      const lines = buffer.split('\n')
+      buffer = lines.pop()
+      let receivedEdges = false
+
+      for (const line of lines) {
+        if (!line.trim()) continue
+        const message = JSON.parse(line)
+        if (message.type === 'edge') {
+          streamedEdges.push(message.edge)
+          receivedEdges = true
+        } else if (message.type === 'progress') {
+          setAnalysisProgress({
+            pairs_done: message.pairs_done,
+            pairs_total: message.pairs_total,
+            percent: message.pairs_total ? Math.round(message.pairs_done / message.pairs_total * 1000) / 10 : 0
+          })
+        } else if (message.type === 'result') {
+          return message
+        } else if (message.type === 'error') {
+          throw new Error(message.message || 'Correlation analysis failed')
+        }
+      }
+
+      if (receivedEdges) {
+        setEdges(strongestEdges(streamedEdges))
+        setBackendConnected(true)
+        setLoading(false)
+      }
+    }
+    throw new Error('Correlation stream ended without a result')
+  }, [runCorrelationJob])
+
   // Send prices to backend for correlation analysis
   const fetchCorrelations = useCallback(async (prices) => {
     try {
       setLoading(true)
+      setAnalysisProgress(null)
       
-      const response = await backendFetch('/api/granger-causality', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ stock_prices: prices })
-      })
-      
-      const data = await response.json()
+      const data = await runCorrelationStream(prices)
       if (data.edges && Array.isArray(data.edges)) {
         setEdges(data.edges)
         setAnalysisStats(data.analysis_summary || null)
@@ -137,8 +236,9 @@ const StockGraph = () => {
       setBackendConnected(false)
     } finally {
       setLoading(false)
+      setAnalysisProgress(null)
     }
-  }, [])
+  }, [runCorrelationStream])
 
   // Generate nodes from stockPrices and watchlistData
   useEffect(() => {
@@ -532,7 +632,11 @@ Please try again later. If the issue persists, the AI service might be temporari
       <div className="flex items-center justify-center h-96">
         <div className="flex items-center space-x-2">
           <RefreshCw className="w-5 h-5 animate-spin text-blue-500" />
-          <span className="text-gray-600">Loading stock correlations...</span>
+          <span className="text-gray-600">
+            Loading stock correlations...
+            {analysisProgress && analysisProgress.pairs_total > 0 &&
+              ` ${analysisProgress.pairs_done}/${analysisProgress.pairs_total} pairs (${analysisProgress.percent}%)`}
+          </span>
       </div>
     </div>
   )
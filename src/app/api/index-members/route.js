@@ -1,4 +1,35 @@
 // API to fetch index members from Yahoo Finance
+// Pass `symbolsOnly=true` for the full constituent list without live prices
+
+// Known constituents per index
+const INDEX_CONSTITUENTS = {
+  'NIFTY50': [
+    'RELIANCE.NS', 'TCS.NS', 'HDFCBANK.NS', 'BHARTIARTL.NS', 'ICICIBANK.NS',
+    'INFY.NS', 'SBIN.NS', 'LT.NS', 'ITC.NS', 'HINDUNILVR.NS',
+    'KOTAKBANK.NS', 'HCLTECH.NS', 'WIPRO.NS', 'MARUTI.NS', 'ASIANPAINT.NS',
+    'AXISBANK.NS', 'TITAN.NS', 'NESTLEIND.NS', 'TECHM.NS', 'SUNPHARMA.NS',
+    'ULTRACEMCO.NS', 'BAJFINANCE.NS', 'BAJAJFINSV.NS', 'ADANIPORTS.NS', 'POWERGRID.NS',
+    'NTPC.NS', 'ONGC.NS', 'COALINDIA.NS', 'DRREDDY.NS', 'CIPLA.NS',
+    'DIVISLAB.NS', 'BRITANNIA.NS', 'HEROMOTOCO.NS', 'BAJAJ-AUTO.NS', 'M&M.NS',
+    'TATAMOTORS.NS', 'TATASTEEL.NS', 'JSWSTEEL.NS', 'HINDALCO.NS', 'VEDL.NS',
+    'INDUSINDBK.NS', 'BANDHANBNK.NS', 'GRASIM.NS', 'APOLLOHOSP.NS', 'BPCL.NS',
+    'SHREECEM.NS', 'EICHERMOT.NS', 'TATACONSUM.NS', 'UPL.NS', 'LTIM.NS'
+  ],
+  'SENSEX': [
+    'RELIANCE.BO', 'TCS.BO', 'HDFCBANK.BO', 'INFY.BO', 'ICICIBANK.BO',
+    'BHARTIARTL.BO', 'SBIN.BO', 'LT.BO', 'ITC.BO', 'KOTAKBANK.BO',
+    'HINDUNILVR.BO', 'HCLTECH.BO', 'MARUTI.BO', 'ASIANPAINT.BO', 'WIPRO.BO',
+    'AXISBANK.BO', 'TITAN.BO', 'NESTLEIND.BO', 'TECHM.BO', 'SUNPHARMA.BO',
+    'ULTRACEMCO.BO', 'BAJFINANCE.BO', 'BAJAJFINSV.BO', 'NTPC.BO', 'POWERGRID.BO',
+    'M&M.BO', 'TATASTEEL.BO', 'JSWSTEEL.BO', 'INDUSINDBK.BO', 'DRREDDY.BO'
+  ],
+  'BANKNIFTY': [
+    'HDFCBANK.NS', 'ICICIBANK.NS', 'SBIN.NS', 'KOTAKBANK.NS', 'AXISBANK.NS',
+    'INDUSINDBK.NS', 'BANKBARODA.NS', 'PNB.NS', 'IDFCFIRSTB.NS', 'FEDERALBNK.NS',
+    'AUBANK.NS', 'BANDHANBNK.NS'
+  ]
+}
+
 export async function GET(request) {
   const { searchParams } = new URL(request.url)
   const index = searchParams.get('index')
@@ -20,6 +51,16 @@ export async function GET(request) {
       return Response.json({ success: false, error: 'Invalid index' }, { status: 400 })
     }
 
+    // Server-side callers (the analysis server) only need the symbols
+    if (searchParams.get('symbolsOnly') === 'true') {
+      return Response.json({
+        success: true,
+        index,
+        symbols: INDEX_CONSTITUENTS[index] || [],
+        lastUpdated: new Date().toISOString()
+      })
+    }
+
     // For now, we'll use predefined data since Yahoo Finance doesn't provide
     // constituent data directly. In production, you'd integrate with NSE/BSE APIs
     // or use services like Alpha Vantage, Financial Modeling Prep, etc.
@@ -45,36 +86,7 @@ export async function GET(request) {
 async function getIndexMembers(index) {
   // Since Yahoo Finance doesn't provide constituent lists directly,
   // we'll fetch the current stock prices for known constituents
-  
-  const indexConstituents = {
-    'NIFTY50': [
-      'RELIANCE.NS', 'TCS.NS', 'HDFCBANK.NS', 'BHARTIARTL.NS', 'ICICIBANK.NS',
-      'INFY.NS', 'SBIN.NS', 'LT.NS', 'ITC.NS', 'HINDUNILVR.NS',
-      'KOTAKBANK.NS', 'HCLTECH.NS', 'WIPRO.NS', 'MARUTI.NS', 'ASIANPAINT.NS',
-      'AXISBANK.NS', 'TITAN.NS', 'NESTLEIND.NS', 'TECHM.NS', 'SUNPHARMA.NS',
-      'ULTRACEMCO.NS', 'BAJFINANCE.NS', 'BAJAJFINSV.NS', 'ADANIPORTS.NS', 'POWERGRID.NS',
-      'NTPC.NS', 'ONGC.NS', 'COALINDIA.NS', 'DRREDDY.NS', 'CIPLA.NS',
-      'DIVISLAB.NS', 'BRITANNIA.NS', 'HEROMOTOCO.NS', 'BAJAJ-AUTO.NS', 'M&M.NS',
-      'TATAMOTORS.NS', 'TATASTEEL.NS', 'JSWSTEEL.NS', 'HINDALCO.NS', 'VEDL.NS',
-      'INDUSINDBK.NS', 'BANDHANBNK.NS', 'GRASIM.NS', 'APOLLOHOSP.NS', 'BPCL.NS',
-      'SHREECEM.NS', 'EICHERMOT.NS', 'TATACONSUM.NS', 'UPL.NS', 'LTIM.NS'
-    ],
-    'SENSEX': [
-      'RELIANCE.BO', 'TCS.BO', 'HDFCBANK.BO', 'INFY.BO', 'ICICIBANK.BO',
-      'BHARTIARTL.BO', 'SBIN.BO', 'LT.BO', 'ITC.BO', 'KOTAKBANK.BO',
-      'HINDUNILVR.BO', 'HCLTECH.BO', 'MARUTI.BO', 'ASIANPAINT.BO', 'WIPRO.BO',
-      'AXISBANK.BO', 'TITAN.BO', 'NESTLEIND.BO', 'TECHM.BO', 'SUNPHARMA.BO',
-      'ULTRACEMCO.BO', 'BAJFINANCE.BO', 'BAJAJFINSV.BO', 'NTPC.BO', 'POWERGRID.BO',
-      'M&M.BO', 'TATASTEEL.BO', 'JSWSTEEL.BO', 'INDUSINDBK.BO', 'DRREDDY.BO'
-    ],
-    'BANKNIFTY': [
-      'HDFCBANK.NS', 'ICICIBANK.NS', 'SBIN.NS', 'KOTAKBANK.NS', 'AXISBANK.NS',
-      'INDUSINDBK.NS', 'BANKBARODA.NS', 'PNB.NS', 'IDFCFIRSTB.NS', 'FEDERALBNK.NS',
-      'AUBANK.NS', 'BANDHANBNK.NS'
-    ]
-  }
-
-  const symbols = indexConstituents[index] || []
+  const symbols = INDEX_CONSTITUENTS[index] || []
   const members = []
 
   // Fetch current prices for a subset of symbols (top 15) to avoid too many API calls
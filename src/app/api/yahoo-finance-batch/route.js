@@ -1,7 +1,8 @@
 // API route for batch fetching Yahoo Finance data for multiple stocks
+// Pass `history: true` to also receive the full daily history for each symbol
 export async function POST(req) {
   try {
-    const { symbols } = await req.json()
+    const { symbols, history = false, timeframe = '6m', interval = '1d' } = await req.json()
     
     if (!symbols || !Array.isArray(symbols) || symbols.length === 0) {
       return Response.json({
@@ -10,14 +11,18 @@ export async function POST(req) {
       }, { status: 400 })
     }
 
-    console.log(`📊 Fetching Yahoo Finance data for ${symbols.length} symbols:`, symbols)
+    console.log(`📊 Fetching Yahoo Finance ${history ? `${timeframe} history` : 'data'} for ${symbols.length} symbols:`, symbols)
+
+    // Quote mode only needs the last daily bar; history mode returns every bar
+    const requestTimeframe = history ? timeframe : '1d'
+    const requestInterval = history ? interval : '1d'
 
     // Fetch data for all symbols in parallel
     const results = await Promise.allSettled(
       symbols.map(async (symbol) => {
         try {
           // Use the existing yahoo-finance API endpoint
-          const response = await fetch(`${process.env.NEXT_PUBLIC_APP_URL || 'http://localhost:3000'}/api/yahoo-finance?symbol=${symbol}&timeframe=1d&interval=1d`, {
+          const response = await fetch(`${process.env.NEXT_PUBLIC_APP_URL || 'http://localhost:3000'}/api/yahoo-finance?symbol=${encodeURIComponent(symbol)}&timeframe=${requestTimeframe}&interval=${requestInterval}`, {
             headers: {
               'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
             }
@@ -30,6 +35,7 @@ export async function POST(req) {
             
             return {
               symbol: symbol,
+              ...(history && { history: data.data }),
               regularMarketPrice: latestData.close,
               regularMarketChange: latestData.close - latestData.open,
               regularMarketChangePercent: ((latestData.close - latestData.open) / latestData.open) * 100,
@@ -38,6 +44,9 @@ export async function POST(req) {
               marketCap: latestData.close * (latestData.volume || 1000000), // Estimated market cap
               lastUpdate: new Date().toISOString()
             }
+          } else if (history) {
+            // History callers handle failures per symbol, so report it as failed
+            throw new Error(data.error || 'No data available')
           } else {
             // Return minimal data structure for failed symbols
             return {
@@ -54,6 +63,9 @@ export async function POST(req) {
           }
         } catch (error) {
           console.error(`Error fetching data for ${symbol}:`, error.message)
+          if (history) {
+            throw error
+          }
           return {
             symbol: symbol,
             regularMarketPrice: 0,
@@ -1,417 +1,1272 @@
-import pandas as pd
-import numpy as np
-from sklearn.naive_bayes import GaussianNB
-from statsmodels.tsa.stattools import grangercausalitytests
-import time
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-import subprocess
 import sys
 import io
 
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
-from flask import Flask, jsonify, request
+if __name__ == "__main__" and '--watch' in sys.argv:
+    # The supervisor only restarts the server process, so it skips every
+    # analysis and web import below; the server child loads those itself
+    from dev_supervisor import watch
+    watch(__file__)
+    sys.exit(0)
+
+# scipy is imported where it is used (or warmed by preload_analysis_modules)
+# so the server answers health checks before it loads; the request path works
+# on PricePanel arrays and does not need pandas
+import numpy as np
+from granger_engine import parallel_granger_pair_pvalues, parallel_granger_ssr_pvalues, rolling_granger_ssr_pvalues
+from naive_bayes_engine import class_mean_differences
+from correlation_engine import correlation_matrices, lagged_correlations
+from influence_graph import TopKGraphBuilder
+from price_panel import PricePanel, align_closes
+from synthetic_prices import generate_synthetic_prices, symbol_rng
+from analysis_jobs import JobCancelled, JobManager
+from analysis_cache import AnalysisCache, create_analysis_cache, history_fingerprint, series_fingerprint
+from precompute import PopularSymbolSets, PrecomputeScheduler
+from metrics import MetricsRegistry, format_metric
+from analysis_logging import PairSampler, configure_logging, get_logger
+import time
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 import warnings
+import os
+import json
+import ipaddress
+import threading
 warnings.filterwarnings('ignore')
 
-class ChangeHandler(FileSystemEventHandler):
-    """Restarts the server on file changes."""
-    def __init__(self, script_name):
-        self.script_name = script_name
-        self.process = None
-        self.start_process()
-
-    def start_process(self):
-        if self.process:
-            self.process.terminate()
-            self.process.wait()
-        
-        self.process = subprocess.Popen([sys.executable, self.script_name, '--run-server'],
-                                        stdout=sys.stdout, stderr=sys.stderr)
-        print(f"Started {self.script_name} with PID: {self.process.pid}")
-
-    def on_any_event(self, event):
-        src_path = event.src_path
-        if isinstance(src_path, (bytes, memoryview)):
-            src_path = src_path.tobytes() if isinstance(src_path, memoryview) else src_path
-            src_path = src_path.decode()
-        if event.is_directory or not str(src_path).endswith('.py'):
-            return
-        print(f"Detected change in {event.src_path}. Restarting server...")
-        self.start_process()
-
-def analyze_stock_influence(stock_data):
+logger = get_logger('analysis')
+
+# Historical data API (the Next.js app) and fetch-stage limits
+YAHOO_API_BASE = os.environ.get('LAKSHMI_API_BASE', 'http://localhost:3000')
+FETCH_MODE = os.environ.get('LAKSHMI_FETCH_MODE', 'batch')  # 'batch' or 'concurrent'
+FETCH_CONCURRENCY = int(os.environ.get('LAKSHMI_FETCH_CONCURRENCY', 8))
+FETCH_TIMEOUT = 10  # seconds per request
+FETCH_DEADLINE = 30  # seconds for the whole fetch stage
+
+# Local daily history store; set LAKSHMI_HISTORY_DIR to '' to disable it
+HISTORY_STORE_DIR = os.environ.get(
+    'LAKSHMI_HISTORY_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.history_store')
+)
+HISTORY_REFRESH_SECONDS = int(os.environ.get('LAKSHMI_HISTORY_REFRESH', 900))
+HISTORY_TRADING_DAYS = 125  # about six months of weekdays, used when no real history loads
+
+# Price panel storage: 'float32' halves panel memory; the statistics stages
+# compute in float64 either way
+PANEL_DTYPE = np.dtype(os.environ.get('LAKSHMI_PANEL_DTYPE', 'float64'))
+
+# Analysis result cache bounds
+CACHE_MAX_ENTRIES = int(os.environ.get('LAKSHMI_CACHE_MAX_ENTRIES', 64))
+CACHE_TTL_SECONDS = int(os.environ.get('LAKSHMI_CACHE_TTL', 1800))
+CACHE_BACKEND = os.environ.get('LAKSHMI_CACHE_BACKEND', 'memory')  # 'memory' or 'sqlite'
+CACHE_PATH = os.environ.get(
+    'LAKSHMI_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.analysis_cache.sqlite3')
+)
+
+# Granger pre-screening: pairs whose strongest lagged cross-correlation of
+# returns is below this are not tested (0 disables screening)
+GRANGER_SCREEN_THRESHOLD = float(os.environ.get('LAKSHMI_GRANGER_SCREEN', 0))
+
+# Per-pair Granger p-value memo (in-process; ~400 bytes per directed pair)
+PAIR_CACHE_MAX_ENTRIES = int(os.environ.get('LAKSHMI_PAIR_CACHE_MAX_ENTRIES', 100000))
+
+# Background job API: concurrent analyses and how long finished jobs are kept
+JOB_WORKERS = int(os.environ.get('LAKSHMI_JOB_WORKERS', 2))
+JOB_RETENTION_SECONDS = int(os.environ.get('LAKSHMI_JOB_RETENTION', 600))
+
+# Influence graph size: edges returned, and strongest outgoing edges kept per node
+GRAPH_TOP_K = int(os.environ.get('LAKSHMI_GRAPH_TOP_K', 20))
+GRAPH_NODE_TOP_K = int(os.environ.get('LAKSHMI_GRAPH_NODE_TOP_K', 5))
+
+# Rolling-window Granger analysis: observations per window and between windows
+ROLLING_WINDOW = int(os.environ.get('LAKSHMI_ROLLING_WINDOW', 60))
+ROLLING_STEP = int(os.environ.get('LAKSHMI_ROLLING_STEP', 5))
+# Windows test up to window // 10 lags (at most 5), so shorter windows test none
+MIN_ROLLING_WINDOW = 10
+
+# Index-universe analysis: constituents come from the Next.js index-members
+# route. Indices listed in LAKSHMI_PRECOMPUTE_INDICES (comma-separated, off by
+# default) are analysed daily at LAKSHMI_PRECOMPUTE_AT market time, after the
+# close, and kept for a day so the first request is served from the cache
+INDEX_NAMES = ('NIFTY50', 'SENSEX', 'BANKNIFTY')
+PRECOMPUTE_INDICES = [
+    name.strip().upper() for name in os.environ.get('LAKSHMI_PRECOMPUTE_INDICES', '').split(',') if name.strip()
+]
+PRECOMPUTE_AT = os.environ.get('LAKSHMI_PRECOMPUTE_AT', '16:00')
+MARKET_TIMEZONE = os.environ.get('LAKSHMI_MARKET_TZ', 'Asia/Kolkata')
+INDEX_CACHE_TTL_SECONDS = int(os.environ.get('LAKSHMI_INDEX_CACHE_TTL', 26 * 3600))
+INDEX_CACHE_PATH = os.environ.get(
+    'LAKSHMI_INDEX_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.index_cache.sqlite3')
+)
+
+# Cache warm-up: the LAKSHMI_WARMUP_SETS most requested symbol sets (0 disables)
+# are kept in the result cache, refreshed every LAKSHMI_WARMUP_INTERVAL seconds
+# (0 = daily at LAKSHMI_PRECOMPUTE_AT, once the day's bar has landed)
+WARMUP_SETS = int(os.environ.get('LAKSHMI_WARMUP_SETS', 5))
+WARMUP_MIN_REQUESTS = int(os.environ.get('LAKSHMI_WARMUP_MIN_REQUESTS', 2))
+WARMUP_INTERVAL = int(os.environ.get('LAKSHMI_WARMUP_INTERVAL', CACHE_TTL_SECONDS // 2))
+WARMUP_LOOKBACK_SECONDS = int(os.environ.get('LAKSHMI_WARMUP_LOOKBACK', 7 * 86400))
+
+# Serving: 'dev' is the Flask development server; 'waitress' and 'gunicorn'
+# are production servers and must be installed separately
+SERVER_HOST = os.environ.get('LAKSHMI_HOST', '127.0.0.1')
+SERVER_PORT = int(os.environ.get('LAKSHMI_PORT', 5001))
+SERVER_MODE = os.environ.get('LAKSHMI_SERVER', 'dev')
+SERVER_WORKERS = int(os.environ.get('LAKSHMI_SERVER_WORKERS', 2))  # gunicorn processes
+SERVER_THREADS = int(os.environ.get('LAKSHMI_SERVER_THREADS', 8))  # request threads per process
+SERVER_TIMEOUT = int(os.environ.get('LAKSHMI_SERVER_TIMEOUT', 300))  # gunicorn worker timeout (s)
+SERVER_PRELOAD = os.environ.get('LAKSHMI_SERVER_PRELOAD', '1') != '0'
+
+# Prometheus metrics, per process, exported on /metrics
+METRICS = MetricsRegistry()
+STAGE_SECONDS = METRICS.histogram(
+    'lakshmi_stage_seconds', 'Wall time of each request stage', ['stage']
+)
+UPSTREAM_FETCH_SECONDS = METRICS.histogram(
+    'lakshmi_upstream_fetch_seconds', 'Latency of requests to the Next.js data API', ['route', 'outcome']
+)
+GRANGER_PAIRS = METRICS.counter(
+    'lakshmi_granger_pairs_total', 'Directed pairs by how their Granger p-values were obtained', ['source']
+)
+GRANGER_PAIR_SECONDS = METRICS.histogram(
+    'lakshmi_granger_pair_seconds', 'Mean Granger test time per computed pair, observed once per sweep',
+    buckets=(1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 0.1)
+)
+ANALYSES_IN_FLIGHT = METRICS.gauge(
+    'lakshmi_analyses_in_flight', 'Analyses currently computing', ['kind']
+)
+
+_http_session = None
+_history_store = None
+_pair_stats_cache = None
+_correlation_cache = None
+# Guards the lazily created shared objects above: analyses run on several
+# job threads, and two of them must not each create their own
+_shared_lock = threading.Lock()
+
+def get_pair_stats_cache():
+    """Return the in-process cache of per-pair Granger p-values"""
+    global _pair_stats_cache
+    with _shared_lock:
+        if _pair_stats_cache is None:
+            _pair_stats_cache = AnalysisCache(
+                max_entries=PAIR_CACHE_MAX_ENTRIES, ttl_seconds=CACHE_TTL_SECONDS
+            )
+        return _pair_stats_cache
+
+def get_correlation_cache():
+    """Return the in-process cache of correlation matrices, keyed by history fingerprint"""
+    global _correlation_cache
+    with _shared_lock:
+        if _correlation_cache is None:
+            _correlation_cache = AnalysisCache(
+                max_entries=CACHE_MAX_ENTRIES, ttl_seconds=CACHE_TTL_SECONDS
+            )
+        return _correlation_cache
+
+def get_correlation_matrices(panel, returns):
+    """
+    Level and return-to-label correlation matrices for a price history, cached
+    under the history's fingerprint so repeated requests skip them
+    Args:
+        panel: PricePanel (dates x symbols)
+        returns: panel.returns()
+    Returns:
+        tuple: (level correlations (N, N), return-to-label correlations (N, N))
+    """
+    correlation_cache = get_correlation_cache()
+    key = history_fingerprint(panel.symbols, panel.values)
+    matrices = correlation_cache.get(key)
+    if matrices is None:
+        matrices = correlation_matrices(panel.values, returns)
+        correlation_cache.set(key, matrices)
+    return matrices
+
+def compute_pairwise_statistics(panel, diffed, maxlag, correlations, granger_workers=1,
+                                progress=None, on_pairs=None, screen_threshold=0.0):
+    """
+    Granger p-values for every ordered pair, memoized per pair.
+    
+    Each directed pair is cached under its symbols, maxlag and a fingerprint of
+    both series, so growing the symbol set from N to N+1 only tests the 2N new
+    pairs. A fully cold request still runs the (optionally parallel) sweep.
+    Args:
+        panel: PricePanel (dates x symbols)
+        diffed: panel.diffs()
+        maxlag: Highest Granger lag
+        correlations: Level correlation matrix (N, N), reported with each pair
+        granger_workers: Worker processes for a full sweep
+        progress: Optional callback(pairs_done, pairs_total) for the Granger tests
+        on_pairs: Optional callback(pairs, pvalues, correlations) called with
+                  cached pairs first, then with each batch of pairs as its
+                  Granger tests finish; pvalues has shape (maxlag, len(pairs))
+        screen_threshold: Untested pairs whose largest absolute lagged
+                          cross-correlation (lags 1..maxlag) is below this are
+                          not tested and stay NaN; 0 tests every pair
+    Returns:
+        tuple: (p-values of shape (maxlag, N, N), shard timings, dict with pair counts)
+    """
+    symbols = panel.symbols
+    n_symbols = len(symbols)
+    values = panel.values
+    fingerprints = [series_fingerprint(values[:, i]) for i in range(n_symbols)]
+    
+    pairs = [(i, j) for i in range(n_symbols) for j in range(n_symbols) if i != j]
+    keys = [
+        (symbols[i], symbols[j], maxlag, len(panel), fingerprints[i], fingerprints[j])
+        for i, j in pairs
+    ]
+    
+    pair_cache = get_pair_stats_cache()
+    granger_pvalues = np.full((maxlag, n_symbols, n_symbols), np.nan)
+    missing = []
+    reused = []
+    for (i, j), cached in zip(pairs, pair_cache.get_many(keys)):
+        if cached is None:
+            missing.append((i, j))
+        else:
+            granger_pvalues[:, i, j] = cached
+            reused.append((i, j))
+    
+    pruned = 0
+    if missing and screen_threshold > 0:
+        # Skip the F-test for pairs whose lagged cross-correlation is weak at every lag
+        screen = np.abs(lagged_correlations(diffed, maxlag)).max(axis=0)
+        sources, targets = np.array(missing).T
+        keep = screen[sources, targets] >= screen_threshold
+        pruned = int(np.count_nonzero(~keep))
+        missing = [pair for pair, kept in zip(missing, keep) if kept]
+    
+    def report(batch):
+        if on_pairs is not None and batch:
+            sources, targets = np.array(batch).T
+            on_pairs(batch, granger_pvalues[:, sources, targets], correlations[sources, targets])
+    
+    report(reused)
+    
+    def report_targets(chunk, chunk_pvalues):
+        granger_pvalues[:, :, chunk] = chunk_pvalues
+        report([(i, j) for j in chunk for i in range(n_symbols) if i != j])
+    
+    granger_shards = []
+    if missing and len(missing) == len(pairs):
+        granger_pvalues[:], granger_shards = parallel_granger_ssr_pvalues(
+            diffed, maxlag, granger_workers, progress=progress,
+            on_targets=report_targets if on_pairs is not None else None
+        )
+    elif missing:
+        # Some pairs cached or screened out: shard just the rest, reporting as shards finish
+        def report_missing(indices, chunk_pvalues):
+            batch = [missing[k] for k in indices]
+            sources, targets = np.array(batch).T
+            granger_pvalues[:, sources, targets] = chunk_pvalues
+            report(batch)
+        
+        missing_pvalues, granger_shards = parallel_granger_pair_pvalues(
+            diffed, maxlag, missing, granger_workers, progress=progress,
+            on_pairs=report_missing if on_pairs is not None else None
+        )
+        sources, targets = np.array(missing).T
+        granger_pvalues[:, sources, targets] = missing_pvalues
+    elif progress is not None:
+        progress(0, 0)
+    
+    if missing:
+        key_index = {pair: key for pair, key in zip(pairs, keys)}
+        pair_cache.set_many([
+            (key_index[(i, j)], granger_pvalues[:, i, j].copy())
+            for i, j in missing
+        ])
+    
+    pair_stats = {"pairs": len(pairs), "computed": len(missing), "reused": len(reused), "pruned": pruned}
+    for source in ('computed', 'reused', 'pruned'):
+        GRANGER_PAIRS.inc(pair_stats[source], source=source)
+    if missing:
+        # Shard seconds overlap when parallel, so this is the sweep's per-pair cost in worker time
+        GRANGER_PAIR_SECONDS.observe(sum(shard['seconds'] for shard in granger_shards) / len(missing))
+    return granger_pvalues, granger_shards, pair_stats
+
+def granger_edge(source, target, pair_pvalues, correlation, significance_threshold):
+    """
+    Build the influence edge for one tested pair
+    Args:
+        source, target: Ticker symbols of the directed pair
+        pair_pvalues: Granger p-value per lag for the pair
+        correlation: Level correlation of the pair
+        significance_threshold: Minimum p-value (over lags) to keep the edge
+    Returns:
+        dict: edge, or None if the pair is untestable or not significant
+    """
+    # Pair could not be tested (too short, constant or perfect fit)
+    if not len(pair_pvalues) or np.isnan(pair_pvalues).any():
+        return None
+    
+    min_pvalue = float(np.min(pair_pvalues))
+    avg_pvalue = float(np.mean(pair_pvalues))
+    
+    # Use minimum p-value as the primary indicator
+    if min_pvalue >= significance_threshold:
+        return None
+    
+    # Calculate influence strength
+    influence = 1 - min_pvalue
+    
+    # Correlation for direction
+    if np.isnan(correlation):
+        correlation = 0.0
+    
+    return {
+        "source": source,
+        "target": target,
+        "value": round(influence, 3),
+        "method": "granger",
+        "correlation": round(float(correlation), 3),
+        "p_value": round(min_pvalue, 4),
+        "avg_p_value": round(avg_pvalue, 4)
+    }
+
+def analyze_stock_influence(stock_data, granger_workers=1, history=None, progress=None, on_edge=None):
     """
     Perform Granger causality and Naive Bayes analysis on stock data
     Args:
         stock_data: Dict of stock prices from frontend (symbol -> price data)
+        granger_workers: Worker processes for the Granger sweep (1 = in-process)
+        history: Optional (PricePanel, data_sources) already returned by
+                 fetch_real_historical_data, to avoid fetching twice
+        progress: Optional callback(pairs_done, pairs_total) for the Granger tests
+        on_edge: Optional callback(edge) called with every significant edge as
+                 soon as its test finishes, before deduplication and top-20
     """
     try:
         if not stock_data:
             raise ValueError("No stock data provided. Stock data is required for analysis.")
         
-        print(f"🎯 Starting analysis for {len(stock_data)} stocks: {list(stock_data.keys())}")
+        logger.info("Starting analysis for %d stocks", len(stock_data))
         
         # Generate enhanced time series data with sufficient length and realistic patterns
-        data, data_sources = fetch_real_historical_data(stock_data)
+        if history is None:
+            history = fetch_real_historical_data(stock_data)
+        panel, data_sources = history
         
-        if data.empty or len(data) < 50:
+        if panel.empty or len(panel) < MIN_ALIGNED_DAYS:
             raise ValueError("Insufficient data generated for analysis")
         
-        symbols = data.columns.tolist()
-        influence_edges = []
+        symbols = panel.symbols
+        graph = TopKGraphBuilder(symbols, top_k=GRAPH_TOP_K, node_k=GRAPH_NODE_TOP_K)
         
-        print(f"📊 Generated data shape: {data.shape}")
-        print(f"📊 Data sources: {data_sources}")
-        print(f"📊 Data sample:\n{data.head()}")
+        logger.info("Price panel: %d dates x %d symbols (%s)", panel.shape[0], panel.shape[1], panel.values.dtype)
+        logger.debug("Data sources: %s", data_sources)
+        logger.debug("Data sample (%s):\n%s", symbols[:5], panel.values[:5, :5])
         
         # Enhanced Granger Causality Analysis
-        maxlag = min(5, len(data) // 10)  # Adaptive lag selection
+        maxlag = min(5, len(panel) // 10)  # Adaptive lag selection
         significance_threshold = 0.10  # Slightly relaxed for demonstration
         
-        print(f"🔍 Running Granger causality tests with maxlag={maxlag}")
+        logger.debug("Running Granger causality tests with maxlag=%d", maxlag)
         
-        # Process all pairs
-        for source in symbols:
-            for target in symbols:
-                if source != target:
-                    try:
-                        # Prepare data for Granger test
-                        pair_data = data[[target, source]].dropna()
-                        
-                        if len(pair_data) < maxlag + 10:
-                            continue
-                        
-                        # Ensure data is stationary (simple differencing)
-                        pair_data_diff = pair_data.diff().dropna()
-                        
-                        if len(pair_data_diff) < maxlag + 5:
-                            continue
-                        
-                        # Run Granger causality test
-                        test_result = grangercausalitytests(
-                            pair_data_diff, 
-                            maxlag=maxlag, 
-                            verbose=False
-                        )
-                        
-                        # Extract p-values and calculate significance
-                        p_values = []
-                        for lag in range(1, maxlag + 1):
-                            if lag in test_result:
-                                p_val = test_result[lag][0]['ssr_ftest'][1]
-                                p_values.append(p_val)
-                        
-                        if p_values:
-                            min_pvalue = min(p_values)
-                            avg_pvalue = np.mean(p_values)
-                            
-                            # Use minimum p-value as the primary indicator
-                            if min_pvalue < significance_threshold:
-                                # Calculate influence strength
-                                influence = 1 - min_pvalue
-                                
-                                # Calculate correlation for direction
-                                correlation = np.corrcoef(pair_data[source], pair_data[target])[0, 1]
-                                if np.isnan(correlation):
-                                    correlation = 0.0
-                                
-                                influence_edges.append({
-                                    "source": source,
-                                    "target": target,
-                                    "value": round(influence, 3),
-                                    "method": "granger",
-                                    "correlation": round(correlation, 3),
-                                    "p_value": round(min_pvalue, 4),
-                                    "avg_p_value": round(avg_pvalue, 4)
-                                })
-                                
-                                print(f"✅ Granger: {source} -> {target}, p={min_pvalue:.4f}, corr={correlation:.3f}")
-                        
-                    except Exception as e:
-                        print(f"⚠️ Granger error {source}->{target}: {e}")
-                        continue
+        # Difference once for the whole panel (simple stationarity transform)
+        diffed = panel.diffs()
         
-        # Enhanced Naive Bayes Analysis
-        print(f"🤖 Running Naive Bayes analysis")
+        # Calculate returns; each Naive Bayes target is labelled by its next-period direction
+        returns = panel.returns()
         
-        # Calculate returns and create binary classification target
-        returns = data.pct_change().dropna()
+        # Wall time per analysis stage, reported with the result
+        stage_seconds = {}
+        stage_started = time.perf_counter()
+        
+        # Level correlations (Granger edge direction) and return-to-label
+        # correlations (Naive Bayes edge direction), computed once per history
+        pair_correlations, nb_correlations = get_correlation_matrices(panel, returns)
+        stage_seconds['correlations'] = time.perf_counter() - stage_started
+        stage_started = time.perf_counter()
+        
+        def emit_granger_edges(pairs, pvalues, correlations):
+            for (i, j), pair_pvalues, correlation in zip(pairs, pvalues.T, correlations):
+                edge = granger_edge(symbols[i], symbols[j], pair_pvalues, correlation, significance_threshold)
+                if edge is not None:
+                    on_edge(edge)
+        
+        # Granger p-values (lag, source, target) for every ordered pair; pairs
+        # whose two series are unchanged come from the pair cache
+        granger_pvalues, granger_shards, pair_stats = compute_pairwise_statistics(
+            panel, diffed, maxlag, pair_correlations, granger_workers, progress=progress,
+            screen_threshold=GRANGER_SCREEN_THRESHOLD,
+            on_pairs=emit_granger_edges if on_edge is not None else None
+        )
+        logger.info(
+            "Granger sweep: %d shard(s), %.3fs total, %d pairs computed, %d reused, %d pruned by screening",
+            len(granger_shards), sum(shard['seconds'] for shard in granger_shards),
+            pair_stats['computed'], pair_stats['reused'], pair_stats['pruned']
+        )
+        
+        # Offer every significant pair in source-major order; untestable pairs
+        # (NaN at any lag) and the diagonal drop out of the comparison
+        with np.errstate(invalid='ignore'):
+            significant = granger_pvalues.min(axis=0) < significance_threshold
+        sample = PairSampler(logger)
+        for i, j in zip(*np.nonzero(significant)):
+            edge = granger_edge(
+                symbols[i], symbols[j], granger_pvalues[:, i, j], pair_correlations[i, j],
+                significance_threshold
+            )
+            if edge is not None:
+                graph.add(edge)
+                if sample():
+                    logger.debug("Granger edge %s -> %s, p=%.4f, corr=%.3f",
+                                 symbols[i], symbols[j], edge['p_value'], edge['correlation'])
+        stage_seconds['granger'] = time.perf_counter() - stage_started
+        stage_started = time.perf_counter()
+        
+        # Enhanced Naive Bayes Analysis
+        logger.debug("Running Naive Bayes analysis")
+        sample = PairSampler(logger)
         
         if len(returns) > 10:
-            # Create binary targets (up/down for next period)
-            targets = {}
-            for symbol in symbols:
-                future_returns = returns[symbol].shift(-1).dropna()
-                targets[symbol] = (future_returns > 0).astype(int)
+            # Class-conditional mean differences (GaussianNB theta_[1] - theta_[0])
+            # for every (feature, target) pair
+            nb_differences, scorable = class_mean_differences(returns)
             
-            for target_symbol in symbols:
-                if target_symbol not in targets:
+            for t, target_symbol in enumerate(symbols):
+                if not scorable[t]:
                     continue
-                    
-                try:
-                    # Prepare features (all other stocks' returns)
-                    feature_symbols = [s for s in symbols if s != target_symbol]
-                    if len(feature_symbols) < 1:
-                        continue
-                    
-                    X = returns[feature_symbols].iloc[:-1]  # Remove last row to match target
-                    y = targets[target_symbol]
-                    
-                    # Ensure we have enough samples
-                    if len(X) < 10 or len(y) < 10 or len(X) != len(y):
-                        continue
-                    
-                    # Check class balance
-                    if y.sum() < 2 or (len(y) - y.sum()) < 2:
-                        continue
-                    
-                    # Fit Naive Bayes
-                    clf = GaussianNB()
-                    clf.fit(X, y)
-                    
-                    # Calculate feature importance
-                    feature_importance = np.abs(clf.theta_[1] - clf.theta_[0])
-                    
-                    # Get top influential features
-                    top_n = min(3, len(feature_symbols))
-                    top_indices = np.argsort(feature_importance)[-top_n:]
-                    
-                    for idx in top_indices:
-                        source_symbol = feature_symbols[idx]
-                        importance = feature_importance[idx]
-                        
-                        if importance > 0.001:  # Minimum threshold
-                            # Calculate correlation for direction
-                            correlation = np.corrcoef(X.iloc[:, idx], y)[0, 1]
-                            if np.isnan(correlation):
-                                correlation = 0.0
-                            
-                            influence_edges.append({
-                                "source": source_symbol,
-                                "target": target_symbol,
-                                "value": round(min(importance * 10, 0.99), 3),
-                                "method": "naive_bayes",
-                                "correlation": round(correlation, 3),
-                                "importance": round(importance, 4)
-                            })
-                            
-                            print(f"✅ NB: {source_symbol} -> {target_symbol}, imp={importance:.4f}, corr={correlation:.3f}")
                 
-                except Exception as e:
-                    print(f"⚠️ Naive Bayes error for {target_symbol}: {e}")
+                # Features are all other stocks' returns
+                feature_indices = [f for f in range(len(symbols)) if f != t]
+                if len(feature_indices) < 1:
                     continue
+                
+                # Calculate feature importance
+                feature_importance = np.abs(nb_differences[feature_indices, t])
+                
+                # Get top influential features
+                top_n = min(3, len(feature_indices))
+                top_indices = np.argsort(feature_importance)[-top_n:]
+                
+                for idx in top_indices:
+                    f = feature_indices[idx]
+                    source_symbol = symbols[f]
+                    importance = feature_importance[idx]
+                    
+                    if importance > 0.001:  # Minimum threshold
+                        # Correlation for direction
+                        correlation = nb_correlations[f, t]
+                        
+                        edge = {
+                            "source": source_symbol,
+                            "target": target_symbol,
+                            "value": round(min(importance * 10, 0.99), 3),
+                            "method": "naive_bayes",
+                            "correlation": round(correlation, 3),
+                            "importance": round(importance, 4)
+                        }
+                        graph.add(edge)
+                        if on_edge is not None:
+                            on_edge(edge)
+                        
+                        if sample():
+                            logger.debug("NB edge %s -> %s, imp=%.4f, corr=%.3f",
+                                         source_symbol, target_symbol, importance, correlation)
+        stage_seconds['naive_bayes'] = time.perf_counter() - stage_started
+        stage_started = time.perf_counter()
         
-        # Combine and deduplicate edges - remove bidirectional correlations, keep stronger one
-        final_edges = []
-        processed_pairs = set()
-        
-        # Sort edges by strength (value) descending
-        influence_edges.sort(key=lambda x: abs(x.get('correlation', x.get('value', 0))), reverse=True)
-        
-        for edge in influence_edges:
-            source = edge['source']
-            target = edge['target']
-            
-            # Create a normalized pair (alphabetically sorted to catch both A->B and B->A)
-            pair = tuple(sorted([source, target]))
-            reverse_pair = (target, source) if source < target else (source, target)
-            
-            # Skip if we've already processed this pair in either direction
-            if pair not in processed_pairs:
-                processed_pairs.add(pair)
-                final_edges.append(edge)
-                print(f"✅ Keeping edge: {source} -> {target} (correlation: {edge.get('correlation', 'N/A')}, strength: {edge.get('value', 'N/A')})")
-            else:
-                print(f"⏭️ Skipping duplicate: {source} -> {target} (weaker correlation)")
-        
-        # Limit to top edges to avoid clutter
-        final_edges = final_edges[:min(20, len(final_edges))]
+        # Global top-20 (one edge per stock pair, stronger one kept) and each
+        # node's strongest outgoing edges, collected in bounded heaps
+        final_edges = graph.top_edges()
+        adjacency = graph.to_csr()
+        stage_seconds['dedup'] = time.perf_counter() - stage_started
+        for stage, seconds in stage_seconds.items():
+            STAGE_SECONDS.observe(seconds, stage=stage)
         
-        print(f"🔄 Removed {len(influence_edges) - len(final_edges)} duplicate/weaker correlations")
+        logger.debug("Removed %d duplicate/weaker correlations", graph.added - len(final_edges))
         
         # Build result
         nodes = [{"id": s} for s in symbols]
         
-        print(f"✅ Analysis complete: {len(nodes)} nodes, {len(final_edges)} edges")
-        print(f"📊 Sample edges: {final_edges[:3] if final_edges else 'None'}")
+        logger.info("Analysis complete: %d nodes, %d edges from %d candidates",
+                    len(nodes), len(final_edges), graph.added)
+        logger.debug("Sample edges: %s", final_edges[:3])
         
-        return {"nodes": nodes, "links": final_edges, "data_sources": data_sources}
+        return {
+            "nodes": nodes,
+            "links": final_edges,
+            "adjacency": adjacency,
+            "candidate_edges": graph.added,
+            "data_sources": data_sources,
+            "granger_shards": granger_shards,
+            "pair_stats": pair_stats,
+            "stage_seconds": {stage: round(seconds, 4) for stage, seconds in stage_seconds.items()}
+        }
         
+    except JobCancelled:
+        # Not a failure: nothing is returned, so nothing empty gets cached
+        raise
     except Exception as e:
-        print(f"❌ Error in analysis: {e}")
-        import traceback
-        traceback.print_exc()
-        return {"nodes": [], "links": [], "data_sources": {}}
+        logger.exception("Error in analysis")
+        return {"nodes": [], "links": [], "adjacency": None, "candidate_edges": 0,
+                "data_sources": {}, "granger_shards": [], "pair_stats": {}, "stage_seconds": {}}
+
+def get_http_session():
+    """Return the shared requests session, pooled for concurrent fetches"""
+    global _http_session
+    with _shared_lock:
+        if _http_session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(FETCH_CONCURRENCY, 1))
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _http_session = session
+        return _http_session
+
+def upstream_request(method, route, **kwargs):
+    """Request a Next.js API route through the shared session, recording its latency"""
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        response = get_http_session().request(method, f"{YAHOO_API_BASE}{route}", **kwargs)
+        outcome = str(response.status_code)
+        return response
+    finally:
+        UPSTREAM_FETCH_SECONDS.observe(time.perf_counter() - started, route=route, outcome=outcome)
+
+def extract_price_history(symbol, chart_data, min_points=30):
+    """
+    Extract dated closing prices from /api/yahoo-finance chart rows
+    Args:
+        symbol: Ticker symbol (for logging)
+        chart_data: List of chart rows with 'date'/'timestamp' and 'close'
+        min_points: Minimum number of usable rows
+    Returns:
+        tuple: (numpy datetime64[D] dates, numpy closing prices), or None if
+               fewer than min_points usable rows
+    """
+    if len(chart_data) >= min_points:
+        logger.debug("Using real Yahoo Finance data for %s: %d points", symbol, len(chart_data))
+        # Extract closing prices with their trading dates
+        rows = [item for item in chart_data if item.get('close') is not None]
+        
+        # Ensure we have enough data
+        if len(rows) >= min_points:
+            dates = np.array([
+                np.datetime64(item['date'], 'D') if item.get('date')
+                else np.datetime64(int(item['timestamp']), 'ms').astype('datetime64[D]')
+                for item in rows
+            ], dtype='datetime64[D]')
+            closes = np.array([float(item['close']) for item in rows])
+            return dates, closes
+    else:
+        logger.warning("Insufficient real data for %s: %d points", symbol, len(chart_data))
+    return None
+
+def fetch_symbol_history(symbol, timeout=FETCH_TIMEOUT, timeframe='6m', min_points=30):
+    """
+    Fetch daily closes for one symbol from the Yahoo Finance API
+    Args:
+        symbol: Ticker symbol
+        timeout: Per-request deadline in seconds
+        timeframe: Route timeframe to request ('5d', '1m', '3m', '6m', ...)
+        min_points: Minimum number of bars for the response to be usable
+    Returns:
+        tuple: (dates, closing prices), or None if the API had no usable data
+    """
+    logger.debug("Fetching %s historical data for %s", timeframe, symbol)
+    
+    try:
+        # Use the yahoo-finance endpoint which has real historical data
+        response = upstream_request(
+            'GET', '/api/yahoo-finance',
+            params={
+                'symbol': symbol,
+                'timeframe': timeframe,
+                'interval': '1d'    # daily data
+            },
+            timeout=timeout
+        )
+        
+        if response.status_code == 200:
+            api_data = response.json()
+            if api_data.get('success') and api_data.get('data'):
+                return extract_price_history(symbol, api_data['data'], min_points)
+            else:
+                logger.warning("API response error for %s: %s", symbol, api_data.get('error', 'Unknown error'))
+        else:
+            logger.warning("HTTP error for %s: %s", symbol, response.status_code)
+            
+    except Exception as api_error:
+        logger.warning("Yahoo Finance API fetch failed for %s: %s", symbol, api_error)
+    
+    return None
+
+def fetch_histories_concurrently(symbols, concurrency=FETCH_CONCURRENCY,
+                                 timeout=FETCH_TIMEOUT, deadline=FETCH_DEADLINE,
+                                 timeframe='6m', min_points=30):
+    """
+    Fetch histories for many symbols over a bounded thread pool
+    Args:
+        symbols: List of ticker symbols
+        concurrency: Maximum requests in flight (1 = serial)
+        timeout: Per-request deadline in seconds
+        deadline: Deadline in seconds for the whole stage; unfinished symbols are dropped
+        timeframe: Route timeframe to request
+        min_points: Minimum number of bars for a response to be usable
+    Returns:
+        dict: {symbol: (dates, closing prices)} for symbols with usable data
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait
+    
+    results = {}
+    if not symbols:
+        return results
+    
+    started = time.time()
+    executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(symbols))))
+    try:
+        futures = {
+            executor.submit(fetch_symbol_history, symbol, timeout, timeframe, min_points): symbol
+            for symbol in symbols
+        }
+        done, pending = wait(futures, timeout=deadline)
+        
+        for future in done:
+            history = future.result()
+            if history is not None:
+                results[futures[future]] = history
+        
+        for future in pending:
+            future.cancel()
+            logger.warning("Fetch deadline exceeded for %s, using fallback", futures[future])
+    finally:
+        executor.shutdown(wait=False)
+    
+    logger.info("Fetched %d/%d histories in %.2fs (concurrency=%d)",
+                len(results), len(symbols), time.time() - started, concurrency)
+    return results
 
-def fetch_real_historical_data(stock_data):
+def fetch_histories_batch(symbols, timeout=FETCH_DEADLINE, timeframe='6m', min_points=30):
+    """
+    Fetch histories for all symbols in one POST to /api/yahoo-finance-batch
+    Args:
+        symbols: List of ticker symbols
+        timeout: Deadline in seconds for the batch request
+        timeframe: Route timeframe to request
+        min_points: Minimum number of bars for a symbol's history to be usable
+    Returns:
+        tuple: ({symbol: (dates, closing prices)} for usable symbols,
+                {symbol: error message} for symbols that failed upstream),
+               or None if the batch route is unavailable or returned no history
+    """
+    started = time.time()
+    try:
+        response = upstream_request(
+            'POST', '/api/yahoo-finance-batch',
+            json={
+                'symbols': symbols,
+                'history': True,
+                'timeframe': timeframe,
+                'interval': '1d'    # daily data
+            },
+            timeout=timeout
+        )
+        if response.status_code != 200:
+            logger.warning("Batch HTTP error: %s", response.status_code)
+            return None
+        api_data = response.json()
+    except Exception as api_error:
+        logger.warning("Batch history fetch failed: %s", api_error)
+        return None
+    
+    if not api_data.get('success'):
+        logger.warning("Batch API response error: %s", api_data.get('error', 'Unknown error'))
+        return None
+    
+    entries = api_data.get('data', [])
+    if entries and not any('history' in entry for entry in entries):
+        # Older route that only returns the latest quote
+        logger.warning("Batch route returned quotes without history")
+        return None
+    
+    results = {}
+    failed = {item.get('symbol'): item.get('error', 'Unknown error') for item in api_data.get('failed', [])}
+    for entry in entries:
+        symbol = entry.get('symbol')
+        history = extract_price_history(symbol, entry.get('history') or [], min_points)
+        if history is not None:
+            results[symbol] = history
+        else:
+            failed[symbol] = entry.get('error', 'Insufficient history')
+    
+    for symbol, error in failed.items():
+        logger.warning("Batch fetch failed for %s: %s", symbol, error)
+    
+    logger.info("Batch fetched %d/%d histories in %.2fs", len(results), len(symbols), time.time() - started)
+    return results, failed
+
+def fetch_histories(symbols, mode=None, concurrency=None, timeframe='6m', min_points=30):
+    """
+    Fetch histories using the configured fetch mode
+    Args:
+        symbols: List of ticker symbols
+        mode: 'batch' (one POST to the batch route) or 'concurrent' (one GET per
+              symbol on a thread pool); defaults to FETCH_MODE
+        concurrency: Maximum concurrent requests in 'concurrent' mode
+        timeframe: Route timeframe to request
+        min_points: Minimum number of bars for a history to be usable
+    Returns:
+        dict: {symbol: (dates, closing prices)} for symbols with usable data
+    """
+    mode = mode or FETCH_MODE
+    concurrency = FETCH_CONCURRENCY if concurrency is None else concurrency
+    
+    if mode == 'batch':
+        batch_result = fetch_histories_batch(symbols, timeframe=timeframe, min_points=min_points)
+        if batch_result is not None:
+            results, failed = batch_result
+            # Symbols the batch never reported on get one individual retry
+            missing = [s for s in symbols if s not in results and s not in failed]
+            if missing:
+                results.update(fetch_histories_concurrently(
+                    missing, concurrency=concurrency, timeframe=timeframe, min_points=min_points
+                ))
+            return results
+        logger.warning("Falling back to per-symbol history requests")
+    
+    return fetch_histories_concurrently(
+        symbols, concurrency=concurrency, timeframe=timeframe, min_points=min_points
+    )
+
+def get_history_store():
+    """Return the on-disk history store, or None when it is disabled"""
+    global _history_store
+    with _shared_lock:
+        if _history_store is None and HISTORY_STORE_DIR:
+            from history_store import HistoryStore
+            _history_store = HistoryStore(HISTORY_STORE_DIR)
+        return _history_store
+
+def tail_timeframe(last_date, today):
+    """Smallest /api/yahoo-finance timeframe covering the bars since last_date"""
+    gap_days = int((today - last_date) / np.timedelta64(1, 'D'))
+    if gap_days <= 5:
+        return '5d'
+    if gap_days <= 30:
+        return '1m'
+    if gap_days <= 90:
+        return '3m'
+    return '6m'
+
+def load_histories(symbols, mode=None, concurrency=None, window_days=180):
+    """
+    Load daily closes for every symbol, reading the on-disk store first.
+
+    Symbols with a fresh stored history are served from disk. Stale symbols
+    only request the missing tail (grouped by the timeframe needed, one
+    fetch per group) and the tail is appended to the store. Unknown symbols
+    fetch the full six months. Without a store every symbol is fetched in full.
+    Args:
+        symbols: List of ticker symbols
+        mode: History fetch mode, 'batch' or 'concurrent'
+        concurrency: Maximum concurrent requests in 'concurrent' mode
+        window_days: Calendar days of history to return
+    Returns:
+        dict: {symbol: (dates, closing prices)} for symbols with usable data
+    """
+    store = get_history_store()
+    if store is None:
+        return fetch_histories(symbols, mode=mode, concurrency=concurrency)
+    from history_store import merge_tail
+    
+    today = np.datetime64('today', 'D')
+    ages = {symbol: store.age(symbol) for symbol in symbols}
+    fresh = {
+        symbol for symbol, age in ages.items()
+        if age is not None and age < HISTORY_REFRESH_SECONDS
+    }
+    # Stale histories are read into memory, not mapped: their files are
+    # replaced below, which Windows refuses while a mapping is open
+    stored = {symbol: store.load(symbol, mmap=symbol in fresh) for symbol in symbols}
+    
+    # Group stale symbols by the timeframe their missing tail needs
+    groups = {}
+    for symbol in symbols:
+        history = stored[symbol]
+        if len(history) >= 30 and symbol in fresh:
+            continue
+        timeframe = tail_timeframe(history['date'][-1], today) if len(history) >= 30 else '6m'
+        groups.setdefault(timeframe, []).append(symbol)
+    
+    from_disk = len(symbols) - sum(len(group) for group in groups.values())
+    logger.info("History store: %d/%d fresh on disk, fetching tails %s",
+                from_disk, len(symbols), {tf: len(group) for tf, group in groups.items()})
+    
+    for timeframe, group in groups.items():
+        min_points = 30 if timeframe == '6m' else 1
+        fetched = fetch_histories(
+            group, mode=mode, concurrency=concurrency, timeframe=timeframe, min_points=min_points
+        )
+        for symbol, (dates, closes) in fetched.items():
+            try:
+                stored[symbol] = store.append(symbol, dates, closes)
+            except OSError as e:
+                # Serve this request from memory; the next one retries the write
+                logger.warning("Could not update stored history for %s: %s", symbol, e)
+                stored[symbol] = merge_tail(stored[symbol], dates, closes)
+    
+    start = today - np.timedelta64(window_days, 'D')
+    results = {}
+    for symbol, history in stored.items():
+        window = history[history['date'] >= start]
+        if len(window) >= 30:
+            results[symbol] = (np.array(window['date']), np.array(window['close']))
+    return results
+
+# Fewest aligned trading days an analysis can run on (see analyze_stock_influence)
+MIN_ALIGNED_DAYS = 50
+
+def fetch_real_historical_data(stock_data, concurrency=None, mode=None):
     """
     Fetch real historical data from your existing Yahoo Finance API or use fallback synthetic data
     Args:
         stock_data: Dict with structure {symbol: {price, change, changePercent, ...}}
+        concurrency: Maximum concurrent API requests (defaults to FETCH_CONCURRENCY)
+        mode: History fetch mode, 'batch' or 'concurrent' (defaults to FETCH_MODE)
     Returns:
-        tuple: (pandas.DataFrame with real historical data, dict with data sources)
+        tuple: (PricePanel of closes on trading dates, in request order, dict with data sources)
     """
-    import datetime
-    import requests
-    
     symbols = list(stock_data.keys())
-    print(f"📊 Fetching real historical data for: {symbols}")
+    logger.debug("Fetching real historical data for: %s", symbols)
     
-    # Generate date range for the last 6 months (optimal for analysis)
-    end_date = datetime.datetime.now()
-    start_date = end_date - datetime.timedelta(days=180)
-    dates = pd.date_range(start=start_date, end=end_date, freq='D')
+    # Load all histories up front (disk store + missing tails) and align them
+    # on the dates they actually traded; everything else falls back to
+    # synthetic data on the same dates
+    with STAGE_SECONDS.time(stage='fetch'):
+        fetched_histories = load_histories(symbols, mode=mode, concurrency=concurrency)
+    align_started = time.perf_counter()
+    aligned, left_out = align_closes(fetched_histories, min_days=MIN_ALIGNED_DAYS, dtype=PANEL_DTYPE)
+    for symbol in left_out:
+        logger.warning("%s history starts too late to align, using synthetic data", symbol)
+    if 0 < len(aligned) < MIN_ALIGNED_DAYS:
+        # Even the earliest starter is too short (e.g. a recent listing):
+        # analyse everything on synthetic data rather than on too few days
+        logger.warning("Only %d aligned trading days for %s, using synthetic data",
+                       len(aligned), aligned.symbols)
+        aligned = aligned.select([])
     
-    data = {}
+    dates = aligned.dates
+    if aligned.empty:
+        # No real history at all: weekdays over the last six months
+        today = np.datetime64('today', 'D')
+        weekdays = np.arange(today - np.timedelta64(2 * HISTORY_TRADING_DAYS, 'D'), today + 1)
+        dates = weekdays[np.is_busday(weekdays)][-HISTORY_TRADING_DAYS:]
+    
+    # The request's panel is filled column by column in request order
+    values = np.empty((len(dates), len(symbols)), dtype=PANEL_DTYPE)
+    columns = {symbol: column for column, symbol in enumerate(symbols)}
     data_sources = {}
-    successful_fetches = 0
+    for column, symbol in enumerate(aligned.symbols):
+        values[:, columns[symbol]] = aligned.values[:, column]
+        data_sources[symbol] = "Yahoo Finance (Real)"
     
+    fallback_params = {}
     for symbol in symbols:
+        if symbol in data_sources:
+            continue
         try:
-            print(f"🔍 Fetching real historical data for {symbol}...")
-            
-            # Try to fetch real historical data from your Yahoo Finance API
-            try:
-                # Use the yahoo-finance endpoint which has real historical data
-                response = requests.get(
-                    f'http://localhost:3000/api/yahoo-finance',
-                    params={
-                        'symbol': symbol,
-                        'timeframe': '6m',  # 6 months
-                        'interval': '1d'    # daily data
-                    },
-                    timeout=10
-                )
-                
-                if response.status_code == 200:
-                    api_data = response.json()
-                    if api_data.get('success') and api_data.get('data'):
-                        chart_data = api_data['data']
-                        if len(chart_data) >= 30:  # At least 30 data points
-                            print(f"✅ Using real Yahoo Finance data for {symbol}: {len(chart_data)} points")
-                            # Extract closing prices
-                            historical_prices = [float(item['close']) for item in chart_data if item.get('close') is not None]
-                            
-                            # Ensure we have enough data and align with dates
-                            if len(historical_prices) >= 30:
-                                # Trim or pad to match our date range
-                                if len(historical_prices) > len(dates):
-                                    data[symbol] = historical_prices[-len(dates):]  # Take the most recent data
-                                else:
-                                    # If we have less data, repeat the pattern to fill
-                                    repetitions = (len(dates) // len(historical_prices)) + 1
-                                    extended_prices = (historical_prices * repetitions)[:len(dates)]
-                                    data[symbol] = extended_prices
-                                
-                                data_sources[symbol] = "Yahoo Finance (Real)"
-                                successful_fetches += 1
-                                continue
-                        else:
-                            print(f"⚠️ Insufficient real data for {symbol}: {len(chart_data)} points")
-                    else:
-                        print(f"⚠️ API response error for {symbol}: {api_data.get('error', 'Unknown error')}")
-                else:
-                    print(f"⚠️ HTTP error for {symbol}: {response.status_code}")
-                    
-            except Exception as api_error:
-                print(f"📡 Yahoo Finance API fetch failed for {symbol}: {api_error}")
-            
-            # Fallback: Generate realistic data based on current price and market patterns
-            print(f"🔄 Generating fallback realistic data for {symbol}")
-            current_price = float(stock_data[symbol].get('price', 100))
-            
-            # Calculate realistic parameters based on current price and change
-            change_percent = float(stock_data[symbol].get('changePercent', 0))
-            daily_return_mean = (change_percent / 100) / 252  # Convert to daily return
-            daily_volatility = max(0.005, min(0.03, abs(daily_return_mean) * 3 + 0.01))
-            
-            # Generate more realistic price series with market patterns
-            np.random.seed(42 + hash(symbol) % 1000)  # Consistent seed per symbol
-            
-            # Start from a reasonable historical price (80% of current)
-            start_price = current_price * 0.8
-            prices = [start_price]
-            
-            for i in range(len(dates) - 1):
-                # Generate return with realistic market behavior
-                random_return = np.random.normal(daily_return_mean, daily_volatility)
-                
-                # Add momentum (autocorrelation)
-                if i > 0:
-                    prev_return = (prices[i] - prices[i-1]) / prices[i-1] if prices[i-1] > 0 else 0
-                    random_return += 0.15 * prev_return  # Momentum effect
-                
-                # Add mean reversion over longer periods
-                if len(prices) > 20:
-                    recent_avg = np.mean(prices[-20:])
-                    deviation = (prices[-1] - recent_avg) / recent_avg
-                    random_return -= 0.05 * deviation  # Mean reversion
-                
-                # Add some market regime changes (volatility clustering)
-                if i > 0 and abs(random_return) > daily_volatility * 2:
-                    # High volatility tends to cluster
-                    if np.random.random() < 0.3:  # 30% chance of continued high volatility
-                        random_return *= 1.5
-                
-                new_price = prices[-1] * (1 + random_return)
-                prices.append(max(new_price, 0.01))  # Ensure positive prices
-            
-            # Scale final price to be close to current price (within 10%)
-            if len(prices) > 0:
-                target_price = current_price * (1 + np.random.uniform(-0.1, 0.1))
-                scale_factor = target_price / prices[-1]
-                prices = [p * scale_factor for p in prices]
-            
-            data[symbol] = prices
-            data_sources[symbol] = "Synthetic (Realistic)"
-            successful_fetches += 1
-            print(f"✅ Generated realistic synthetic data for {symbol}: {len(prices)} points")
-            
+            # Fallback: synthetic data, generated for all such symbols in one pass below
+            fallback_params[symbol] = (
+                float(stock_data[symbol].get('price', 100)),
+                float(stock_data[symbol].get('changePercent', 0))
+            )
         except Exception as e:
-            print(f"⚠️ Error processing {symbol}: {e}")
+            logger.warning("Error processing %s: %s", symbol, e)
             # Emergency fallback to simple data
-            current_price = float(stock_data[symbol].get('price', 100))
-            simple_prices = [current_price * (1 + np.random.uniform(-0.02, 0.02)) for _ in range(len(dates))]
-            data[symbol] = simple_prices
+            try:
+                current_price = float(stock_data[symbol].get('price', 100))
+            except (TypeError, ValueError, AttributeError):
+                current_price = 100.0
+            rng = symbol_rng(symbol)
+            values[:, columns[symbol]] = current_price * (1 + rng.uniform(-0.02, 0.02, len(dates)))
             data_sources[symbol] = "Synthetic (Simple)"
     
-    print(f"📊 Successfully processed {successful_fetches}/{len(symbols)} symbols")
-    print(f"📊 Data sources summary: {data_sources}")
+    if fallback_params:
+        # Generate realistic data based on current price and market patterns
+        fallback_symbols = list(fallback_params)
+        logger.debug("Generating fallback realistic data for %s", fallback_symbols)
+        current_prices, change_percents = zip(*fallback_params.values())
+        synthetic_prices = generate_synthetic_prices(
+            fallback_symbols, current_prices, change_percents, len(dates)
+        )
+        values[:, [columns[symbol] for symbol in fallback_symbols]] = synthetic_prices
+        for symbol in fallback_symbols:
+            data_sources[symbol] = "Synthetic (Realistic)"
+        logger.info("Generated synthetic data for %d symbols: %d points each", len(fallback_symbols), len(dates))
+    
+    panel = PricePanel(values, symbols, dates)
+    STAGE_SECONDS.observe(time.perf_counter() - align_started, stage='align')
     
-    # Ensure all data arrays have the same length as dates
-    for symbol in symbols:
-        if len(data[symbol]) != len(dates):
-            print(f"⚠️ Length mismatch for {symbol}: {len(data[symbol])} vs {len(dates)} dates")
-            if len(data[symbol]) > len(dates):
-                data[symbol] = data[symbol][:len(dates)]
-            elif len(data[symbol]) < len(dates):
-                # Pad with the last value
-                last_value = data[symbol][-1] if data[symbol] else 100.0
-                while len(data[symbol]) < len(dates):
-                    data[symbol].append(last_value)
-            print(f"✅ Fixed {symbol} data length to {len(data[symbol])}")
+    real_count = sum('Yahoo' in source for source in data_sources.values())
+    logger.info("Aligned price panel: %d trading days x %d symbols (%s), %d with real data, %s to %s",
+                len(dates), len(symbols), PANEL_DTYPE, real_count,
+                dates[0] if len(dates) else None, dates[-1] if len(dates) else None)
+    logger.debug("Data sources summary: %s", data_sources)
     
-    # Convert to DataFrame
-    df = pd.DataFrame(data, index=dates)
+    return panel, data_sources
+
+def format_edge(link):
+    """Convert an analysis link to the edge format returned by the API"""
+    edge = {
+        "source": link['source'],
+        "target": link['target'],
+        "correlation": link.get('correlation', 0),
+        "value": link.get('value', 0),
+        "method": link.get('method', 'unknown')
+    }
     
-    print(f"📊 Enhanced time series created: {df.shape}")
-    print(f"📊 Date range: {df.index[0]} to {df.index[-1]}")
-    print(f"📊 Real data percentage: {len([s for s in data_sources.values() if 'Yahoo' in s])/len(symbols)*100:.1f}%")
+    # Add method-specific fields
+    if link.get('p_value') is not None:
+        edge['p_value'] = link['p_value']
+    if link.get('importance') is not None:
+        edge['importance'] = link['importance']
     
-    return df, data_sources
+    return edge
 
-def run_server():
+def analyze_rolling_influence(stock_data, window=ROLLING_WINDOW, step=ROLLING_STEP, history=None):
     """
-    Enhanced Flask server with improved Granger causality analysis
+    Granger causality p-values per pair over a sliding window of the history
+    Args:
+        stock_data: Dict of stock prices from frontend (symbol -> price data)
+        window: Differenced observations per window
+        step: Observations the window advances between evaluations
+        history: Optional (PricePanel, data_sources) from fetch_real_historical_data
+    Returns:
+        dict: window end dates, and for every pair significant in at least one
+              window its minimum p-value over lags per window (None if untestable)
+    """
+    if history is None:
+        history = fetch_real_historical_data(stock_data)
+    panel, data_sources = history
+    
+    if window < MIN_ROLLING_WINDOW:
+        raise ValueError(f"Rolling window must be at least {MIN_ROLLING_WINDOW} observations")
+    
+    symbols = panel.symbols
+    diffed = panel.diffs()
+    maxlag = min(5, window // 10)
+    significance_threshold = 0.10  # Same as the snapshot analysis
+    
+    logger.info("Rolling Granger analysis: window=%d, step=%d, maxlag=%d, %d observations",
+                window, step, maxlag, len(diffed))
+    started = time.perf_counter()
+    with ANALYSES_IN_FLIGHT.track_inprogress(kind='rolling'), STAGE_SECONDS.time(stage='rolling_granger'):
+        pvalues, window_ends = rolling_granger_ssr_pvalues(diffed, maxlag, window, step)
+    
+    # Same rule as the snapshot edges: a pair's p-value is its minimum over lags
+    min_pvalues = pvalues.min(axis=1)
+    with np.errstate(invalid='ignore'):
+        significant = (min_pvalues < significance_threshold).any(axis=0)
+    
+    pairs = []
+    for i, j in zip(*np.nonzero(significant)):
+        pairs.append({
+            "source": symbols[i],
+            "target": symbols[j],
+            "p_values": [None if np.isnan(p) else round(float(p), 4) for p in min_pvalues[:, i, j]]
+        })
+    logger.info("Rolling analysis: %d windows, %d pairs significant in at least one, %.3fs",
+                len(window_ends), len(pairs), time.perf_counter() - started)
+    
+    return {
+        # The window ending before diffed row `end` closes on panel date `end`
+        "timestamps": panel.date_strings()[np.asarray(window_ends, dtype=np.intp)].tolist(),
+        "window": window,
+        "step": step,
+        "maxlag": maxlag,
+        "significance_threshold": significance_threshold,
+        "pairs": pairs,
+        "data_sources": data_sources,
+        "symbols": sorted(symbols)
+    }
+
+def run_analysis(stock_prices, granger_workers=1, history=None, progress=None, on_edge=None):
+    """
+    Run the influence analysis and shape it for the API and the result cache
+    Args:
+        stock_prices: Dict of stock prices from frontend (symbol -> price data)
+        granger_workers: Worker processes for the Granger sweep
+        history: Optional (PricePanel, data_sources) from fetch_real_historical_data
+        progress: Optional callback(pairs_done, pairs_total) for the Granger tests
+        on_edge: Optional callback(edge) receiving each significant edge in API
+                 format as soon as it is found
+    Returns:
+        dict: JSON-serialisable entry with edges, adjacency (per-node top-k
+              edges as CSR arrays), timestamp, data_sources, analysis_summary
+              and symbols
+    """
+    logger.info("Running fresh analysis for %d stocks", len(stock_prices))
+    logger.debug("Symbols: %s", list(stock_prices.keys()))
+    
+    # Run analysis
+    with ANALYSES_IN_FLIGHT.track_inprogress(kind='snapshot'):
+        result = analyze_stock_influence(
+            stock_data=stock_prices, granger_workers=granger_workers, history=history, progress=progress,
+            on_edge=(lambda link: on_edge(format_edge(link))) if on_edge is not None else None
+        )
+    
+    # Convert to expected format
+    edges = [format_edge(link) for link in result['links']]
+    
+    real_data_count = len([s for s in result.get('data_sources', {}).values() if 'Yahoo' in s])
+    total_count = len(result.get('data_sources', {}))
+    
+    analysis_summary = {
+        "total_edges": len(edges),
+        "granger_edges": len([e for e in edges if e['method'] == 'granger']),
+        "naive_bayes_edges": len([e for e in edges if e['method'] == 'naive_bayes']),
+        "real_data_stocks": real_data_count,
+        "total_stocks": total_count,
+        "real_data_percentage": round(real_data_count/total_count*100, 1) if total_count > 0 else 0,
+        "granger_workers": granger_workers,
+        "candidate_edges": result.get('candidate_edges', 0),
+        "granger_shards": result.get('granger_shards', []),
+        "pair_stats": result.get('pair_stats', {}),
+        "stage_seconds": result.get('stage_seconds', {})
+    }
+    
+    logger.info("Analysis complete: %d edges for %d stocks, real data for %d/%d",
+                len(edges), len(stock_prices), real_data_count, total_count)
+    
+    # Cache entry with its symbol set (listed by /api/health)
+    return {
+        'edges': edges,
+        'adjacency': result.get('adjacency'),
+        'timestamp': time.time(),
+        'data_sources': result.get('data_sources', {}),
+        'analysis_summary': analysis_summary,
+        'symbols': sorted(stock_prices.keys())
+    }
+
+def resolve_index_members(index_name, timeout=FETCH_TIMEOUT):
+    """
+    Constituent symbols of an index from the index-members route
+    Args:
+        index_name: One of INDEX_NAMES
+        timeout: Request deadline in seconds
+    Returns:
+        list: Ticker symbols
+    """
+    response = upstream_request(
+        'GET', '/api/index-members',
+        params={"index": index_name, "symbolsOnly": "true"},
+        timeout=timeout
+    )
+    response.raise_for_status()
+    payload = response.json()
+    if not payload.get('success') or not payload.get('symbols'):
+        raise ValueError(f"No constituents for index {index_name}: {payload.get('error', 'empty response')}")
+    return payload['symbols']
+
+def analyze_index_universe(index_name, granger_workers=1):
+    """
+    Run the influence analysis over every constituent of an index.
+    
+    Histories come from the local history store (only missing tails are
+    fetched). Constituents without real history are left out rather than
+    filled with synthetic prices, since nothing in the request describes them.
+    Args:
+        index_name: One of INDEX_NAMES
+        granger_workers: Worker processes for the Granger sweep
+    Returns:
+        dict: run_analysis cache entry plus the index name and its members
+    """
+    started = time.time()
+    members = resolve_index_members(index_name)
+    logger.info("Analysing %s universe: %d constituents", index_name, len(members))
+    
+    panel, data_sources = fetch_real_historical_data({symbol: {} for symbol in members})
+    real_symbols = [symbol for symbol in panel.symbols if 'Yahoo' in data_sources.get(symbol, '')]
+    if len(real_symbols) < 2:
+        raise ValueError(f"Only {len(real_symbols)} {index_name} constituents have real history")
+    if len(real_symbols) < len(members):
+        logger.warning("%d %s constituents without real history left out", len(members) - len(real_symbols), index_name)
+    
+    history = (panel.select(real_symbols), {symbol: data_sources[symbol] for symbol in real_symbols})
+    entry = run_analysis(
+        {symbol: {} for symbol in real_symbols}, granger_workers=granger_workers, history=history
+    )
+    entry['index'] = index_name
+    entry['members'] = members
+    logger.info("%s universe analysed in %.1fs", index_name, time.time() - started)
+    return entry
+
+def preload_analysis_modules():
+    """Import the heavy analysis dependencies now, e.g. before forking server workers"""
+    import scipy.stats  # noqa: F401
+
+def create_app(granger_workers=1, start_warmup=True):
+    """
+    Build the Flask app with its result cache and job manager
+    Args:
+        granger_workers: Worker processes used for each Granger pair sweep
+        start_warmup: Start the popular-set warm-up here; a preloading server
+                      passes False and starts app.extensions['lakshmi_warmup']
+                      in each worker after forking (None when warm-up is off)
+    Returns:
+        Flask: WSGI application
     """
     app = Flask(__name__)
     CORS(app)
 
-    # Enhanced cache with metadata
-    results_cache = {}
+    # Bounded LRU + TTL cache keyed by symbol set and history content; the
+    # 'sqlite' backend is shared by every worker process on this host
+    results_cache = create_analysis_cache(
+        backend=CACHE_BACKEND,
+        path=CACHE_PATH,
+        max_entries=CACHE_MAX_ENTRIES,
+        ttl_seconds=CACHE_TTL_SECONDS
+    )
+    
+    # Background analyses for the job API; identical in-flight requests share a job
+    job_manager = JobManager(max_workers=JOB_WORKERS, retention_seconds=JOB_RETENTION_SECONDS)
+    
+    # Index-universe results live for a day in their own cache, so request
+    # traffic on results_cache never evicts them
+    index_cache = create_analysis_cache(
+        backend=CACHE_BACKEND,
+        path=INDEX_CACHE_PATH,
+        max_entries=len(INDEX_NAMES),
+        ttl_seconds=INDEX_CACHE_TTL_SECONDS
+    )
+    
+    def precompute_index(index_name, due_at):
+        """Analyse index_name unless a result at least as new as due_at is stored"""
+        key = f"index:{index_name}"
+        # The lock and re-check keep server workers sharing an sqlite cache
+        # from precomputing the same index twice
+        with index_cache.lock(key):
+            entry = index_cache.get(key, count=False)
+            if entry is not None and entry['timestamp'] >= due_at:
+                logger.info("%s universe already precomputed", index_name)
+                return
+            index_cache.set(key, analyze_index_universe(index_name, granger_workers=granger_workers))
+    
+    # Symbol sets seen by this process, most requested first, for the warm-up
+    popular_sets = PopularSymbolSets()
+    
+    def warm_popular_sets(due_at):
+        """Make sure the most requested symbol sets have a fresh result cached"""
+        symbol_sets = popular_sets.top(WARMUP_SETS, WARMUP_MIN_REQUESTS, WARMUP_LOOKBACK_SECONDS)
+        computed = 0
+        for stock_prices in symbol_sets:
+            try:
+                # Refreshes the history store, so a new daily bar yields a new key
+                history = fetch_real_historical_data(stock_prices)
+                cache_key = create_cache_key(set(stock_prices), history[0])
+                with results_cache.lock(cache_key):
+                    entry = results_cache.get(cache_key, count=False)
+                    if entry is None:
+                        entry = run_analysis(stock_prices, granger_workers=granger_workers, history=history)
+                        computed += 1
+                    # Storing again restarts the TTL, so the set stays warm until the next run
+                    results_cache.set(cache_key, entry)
+            except Exception as e:
+                logger.warning("Warm-up failed for %s: %s", sorted(stock_prices), e)
+        if symbol_sets:
+            logger.info("Warm-up: %d popular symbol sets cached, %d recomputed", len(symbol_sets), computed)
+    
+    # Index precompute writes to a cache shared across workers and runs once,
+    # where the app is built. Warm-up reads this process's request counts,
+    # so it has a scheduler of its own that runs in every serving process
+    scheduler = None
+    if PRECOMPUTE_INDICES:
+        scheduler = PrecomputeScheduler(run_at=PRECOMPUTE_AT, timezone=MARKET_TIMEZONE)
+        for index_name in PRECOMPUTE_INDICES:
+            scheduler.add_task(
+                f"index:{index_name}",
+                lambda due_at, index_name=index_name: precompute_index(index_name, due_at)
+            )
+    warmup_scheduler = None
+    if WARMUP_SETS > 0:
+        warmup_scheduler = PrecomputeScheduler(run_at=PRECOMPUTE_AT, timezone=MARKET_TIMEZONE)
+        warmup_scheduler.add_task('warmup', warm_popular_sets, interval=WARMUP_INTERVAL or None)
+    app.extensions['lakshmi_warmup'] = warmup_scheduler
+    
+    def validate_stock_prices(stock_prices):
+        """Return an error response for an unusable request body, or None"""
+        if not stock_prices:
+            return jsonify({"success": False, "message": "No stock prices provided"}), 400
+        
+        if not isinstance(stock_prices, dict):
+            return jsonify({
+                "success": False,
+                "message": "stock_prices must be an object keyed by symbol"
+            }), 400
+        
+        if len(stock_prices) < 2:
+            return jsonify({
+                "success": False, 
+                "message": "Need at least 2 stocks for correlation analysis"
+            }), 400
+        return None
+    
+    def json_response(payload):
+        """jsonify, timed as the 'serialize' stage"""
+        with STAGE_SECONDS.time(stage='serialize'):
+            return jsonify(payload)
+    
+    def cached_analysis(stock_prices, progress=None, set_stage=None, on_edge=None):
+        """
+        Load history, then serve the analysis from the result cache or compute it.
+        on_edge only sees edges when the analysis is computed by this call.
+        """
+        if set_stage:
+            set_stage('fetching')
+        
+        popular_sets.record(stock_prices)
+        
+        # Load history first: the cache key is derived from it, not from the live quote
+        symbols_set = set(stock_prices.keys())
+        history = fetch_real_historical_data(stock_prices)
+        cache_key = create_cache_key(symbols_set, history[0])
+        
+        if set_stage:
+            set_stage('analyzing')
+        
+        # Only one worker computes a given key; the others wait and reuse its result
+        cached_result, cached = results_cache.get_or_compute(
+            cache_key,
+            lambda: run_analysis(
+                stock_prices, granger_workers=granger_workers, history=history,
+                progress=progress, on_edge=on_edge
+            )
+        )
+        if cached:
+            logger.info("Using cached result for %d stocks", len(stock_prices))
+        
+        return {
+            "success": True, 
+            "edges": cached_result['edges'],
+            "adjacency": cached_result.get('adjacency'),
+            "cached": cached,
+            "timestamp": cached_result['timestamp'],
+            "data_sources": cached_result.get('data_sources', {}),
+            "analysis_summary": cached_result.get('analysis_summary', {})
+        }
+    
+    def analysis_job_key(stock_prices):
+        """Job deduplication key: requests for the same symbol set share a job"""
+        return ','.join(sorted(stock_prices.keys()))
+    
+    def analysis_job(stock_prices):
+        """Job body for cached_analysis, reporting stage, progress and edges to the job"""
+        def run(job):
+            return cached_analysis(
+                stock_prices, progress=job.progress, set_stage=job.set_stage, on_edge=job.add_edge
+            )
+        return run
     
     @app.route('/api/granger-causality', methods=['POST'])
     def granger_causality():
@@ -419,131 +1274,252 @@ def run_server():
             request_data = request.get_json()
             stock_prices = request_data.get('stock_prices', {})
             
-            print(f"📡 Received request for {len(stock_prices)} stocks: {list(stock_prices.keys())}")
+            logger.info("Received request for %d stocks", len(stock_prices))
             
-            if not stock_prices:
-                return jsonify({"success": False, "message": "No stock prices provided"}), 400
+            error_response = validate_stock_prices(stock_prices)
+            if error_response:
+                return error_response
             
-            if len(stock_prices) < 2:
-                return jsonify({
-                    "success": False, 
-                    "message": "Need at least 2 stocks for correlation analysis"
-                }), 400
+            return json_response(cached_analysis(stock_prices))
             
-            # Create cache key based on symbol count and symbols (to detect new stocks)
-            symbols_set = set(stock_prices.keys())
-            cache_key = create_cache_key(stock_prices, symbols_set)
+        except Exception as e:
+            logger.exception("Error in granger_causality endpoint")
+            return jsonify({
+                "success": False, 
+                "message": str(e),
+                "error_type": type(e).__name__
+            }), 500
+    
+    @app.route('/api/granger-causality/stream', methods=['POST'])
+    def granger_causality_stream():
+        """
+        Streaming variant of /api/granger-causality.
+        
+        Emits one message per significant edge as soon as its test finishes
+        (before deduplication), progress messages for the Granger tests, and a
+        final 'result' message carrying the same body as the non-streaming
+        endpoint. NDJSON by default; server-sent events with ?format=sse.
+        """
+        # Validated up front: once the stream starts, errors can only be sent as messages
+        request_data = request.get_json(silent=True)
+        if not isinstance(request_data, dict):
+            return jsonify({
+                "success": False,
+                "message": "Request body must be a JSON object",
+                "error_type": "BadRequest"
+            }), 400
+        stock_prices = request_data.get('stock_prices', {})
+        use_sse = request.args.get('format') == 'sse'
+        
+        logger.info("Received streaming request for %d stocks", len(stock_prices))
+        
+        error_response = validate_stock_prices(stock_prices)
+        if error_response:
+            return error_response
+        
+        # Run on the job pool, sharing in-flight work with identical job and
+        # stream requests; the stream relays the job's edges and progress.
+        # If every stream on the job disconnects it is cancelled.
+        job, created = job_manager.submit(
+            analysis_job_key(stock_prices), sorted(stock_prices), analysis_job(stock_prices), stream=True
+        )
+        logger.info("%s job %s for streaming %d stocks",
+                    'Queued' if created else 'Joined in-flight', job.id, len(stock_prices))
+        
+        def encode(message):
+            if use_sse:
+                return f"event: {message['type']}\ndata: {json.dumps(message)}\n\n"
+            return json.dumps(message) + "\n"
+        
+        def stream():
+            version = -1
+            edges_sent = 0
+            progress_sent = (0, 0)
+            try:
+                while True:
+                    changed = job.wait_for_change(version, timeout=15)
+                    idle, version = changed == version, changed
+                    edges = job.edges[edges_sent:]
+                    edges_sent += len(edges)
+                    for edge in edges:
+                        yield encode({"type": "edge", "edge": edge})
+                    progress = (job.pairs_done, job.pairs_total)
+                    if progress != progress_sent:
+                        progress_sent = progress
+                        yield encode({"type": "progress", "pairs_done": progress[0], "pairs_total": progress[1]})
+                    if job.finished:
+                        if job.status == 'done':
+                            yield encode({"type": "result", **job.result})
+                        else:
+                            yield encode({
+                                "type": "error",
+                                "success": False,
+                                "message": job.error or f"Analysis {job.status}",
+                                "error_type": job.error_type
+                            })
+                        return
+                    if idle:
+                        # Keep-alive (ignored by clients); a disconnect surfaces on this write
+                        yield ": keep-alive\n\n" if use_sse else "\n"
+            finally:
+                job_manager.release(job)
+        
+        return Response(
+            stream(),
+            mimetype='text/event-stream' if use_sse else 'application/x-ndjson',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+    
+    @app.route('/api/granger-causality/rolling', methods=['POST'])
+    def granger_causality_rolling():
+        """Time-indexed Granger p-values per pair over a sliding window"""
+        try:
+            request_data = request.get_json()
+            stock_prices = request_data.get('stock_prices', {})
+            window = int(request_data.get('window', ROLLING_WINDOW))
+            step = int(request_data.get('step', ROLLING_STEP))
             
-            # Check if we have cached results and if the symbol set matches
-            cache_valid = False
-            if cache_key in results_cache:
-                cached_symbols = results_cache[cache_key].get('symbols_set', set())
-                if cached_symbols == symbols_set:
-                    cache_valid = True
-                    print(f"📦 Using cached result for {len(stock_prices)} stocks")
-                else:
-                    print(f"🔄 Symbol set changed, invalidating cache. Old: {cached_symbols}, New: {symbols_set}")
-                    # Remove invalid cache entry
-                    del results_cache[cache_key]
+            logger.info("Received rolling request for %d stocks (window=%d, step=%d)", len(stock_prices), window, step)
             
-            if cache_valid:
-                cached_result = results_cache[cache_key]
+            error_response = validate_stock_prices(stock_prices)
+            if error_response:
+                return error_response
+            if window < MIN_ROLLING_WINDOW or step < 1:
                 return jsonify({
-                    "success": True, 
-                    "edges": cached_result['edges'],
-                    "cached": True,
-                    "timestamp": cached_result['timestamp'],
-                    "data_sources": cached_result.get('data_sources', {}),
-                    "analysis_summary": cached_result.get('analysis_summary', {})
-                })
-            
-            print(f"🔄 Running fresh analysis for {len(stock_prices)} stocks: {list(stock_prices.keys())}")
-            
-            # Run analysis
-            result = analyze_stock_influence(stock_data=stock_prices)
+                    "success": False,
+                    "message": f"window must be at least {MIN_ROLLING_WINDOW} and step at least 1"
+                }), 400
             
-            # Convert to expected format
-            edges = []
-            for link in result['links']:
-                edge = {
-                    "source": link['source'],
-                    "target": link['target'],
-                    "correlation": link.get('correlation', 0),
-                    "value": link.get('value', 0),
-                    "method": link.get('method', 'unknown')
+            history = fetch_real_historical_data(stock_prices)
+            cache_key = f"rolling:{window}:{step}:{create_cache_key(set(stock_prices.keys()), history[0])}"
+            result, cached = results_cache.get_or_compute(
+                cache_key,
+                lambda: {
+                    **analyze_rolling_influence(stock_prices, window=window, step=step, history=history),
+                    'timestamp': time.time()
                 }
-                
-                # Add method-specific fields
-                if link.get('p_value') is not None:
-                    edge['p_value'] = link['p_value']
-                if link.get('importance') is not None:
-                    edge['importance'] = link['importance']
-                
-                edges.append(edge)
+            )
+            return json_response({"success": True, "cached": cached, **result})
             
-            real_data_count = len([s for s in result.get('data_sources', {}).values() if 'Yahoo' in s])
-            total_count = len(result.get('data_sources', {}))
+        except Exception as e:
+            logger.exception("Error in rolling granger endpoint")
+            return jsonify({
+                "success": False, 
+                "message": str(e),
+                "error_type": type(e).__name__
+            }), 500
+    
+    @app.route('/api/granger-causality/index/<index_name>', methods=['GET'])
+    def granger_causality_index(index_name):
+        """Influence graph over a whole index, precomputed daily or computed on first request"""
+        try:
+            index_name = index_name.upper()
+            if index_name not in INDEX_NAMES:
+                return jsonify({
+                    "success": False,
+                    "message": f"Unknown index: {index_name} (expected one of {', '.join(INDEX_NAMES)})"
+                }), 404
             
-            analysis_summary = {
-                "total_edges": len(edges),
-                "granger_edges": len([e for e in edges if e['method'] == 'granger']),
-                "naive_bayes_edges": len([e for e in edges if e['method'] == 'naive_bayes']),
-                "real_data_stocks": real_data_count,
-                "total_stocks": total_count,
-                "real_data_percentage": round(real_data_count/total_count*100, 1) if total_count > 0 else 0
-            }
+            logger.info("Received index request for %s", index_name)
+            result, cached = index_cache.get_or_compute(
+                f"index:{index_name}",
+                lambda: analyze_index_universe(index_name, granger_workers=granger_workers)
+            )
+            return json_response({
+                "success": True,
+                "index": index_name,
+                "members": result.get('members', []),
+                "symbols": result.get('symbols', []),
+                "edges": result['edges'],
+                "adjacency": result.get('adjacency'),
+                "cached": cached,
+                "timestamp": result['timestamp'],
+                "data_sources": result.get('data_sources', {}),
+                "analysis_summary": result.get('analysis_summary', {})
+            })
             
-            # Cache the result with symbol set for validation
-            results_cache[cache_key] = {
-                'edges': edges,
-                'timestamp': time.time(),
-                'data_sources': result.get('data_sources', {}),
-                'analysis_summary': analysis_summary,
-                'symbols_set': symbols_set  # Store the symbols set for cache validation
-            }
+        except Exception as e:
+            logger.exception("Error in index endpoint")
+            return jsonify({
+                "success": False, 
+                "message": str(e),
+                "error_type": type(e).__name__
+            }), 500
+    
+    @app.route('/api/granger-causality/jobs', methods=['POST'])
+    def submit_analysis_job():
+        """Queue an analysis and return its job id immediately"""
+        try:
+            request_data = request.get_json()
+            stock_prices = request_data.get('stock_prices', {})
+            
+            logger.info("Received job request for %d stocks", len(stock_prices))
             
-            # Clear old cache entries if we have too many
-            if len(results_cache) > 5:  # Reduced cache size to be more responsive
-                # Sort by timestamp and keep only the 3 most recent
-                sorted_cache = sorted(results_cache.items(), key=lambda x: x[1]['timestamp'], reverse=True)
-                results_cache.clear()
-                for key, value in sorted_cache[:3]:
-                    results_cache[key] = value
-                print(f"🧹 Cleaned cache, keeping {len(results_cache)} most recent entries")
+            error_response = validate_stock_prices(stock_prices)
+            if error_response:
+                return error_response
             
-            print(f"✅ Analysis complete: {len(edges)} edges found for {len(stock_prices)} stocks")
-            print(f"📊 Real data: {real_data_count}/{total_count} stocks ({real_data_count/total_count*100:.1f}%)" if total_count > 0 else "📊 No data sources info")
+            symbols = sorted(stock_prices.keys())
+            job, created = job_manager.submit(analysis_job_key(stock_prices), symbols, analysis_job(stock_prices))
+            logger.info("%s job %s for %d stocks", 'Queued' if created else 'Joined in-flight', job.id, len(symbols))
             
             return jsonify({
-                "success": True, 
-                "edges": edges,
-                "cached": False,
-                "analysis_summary": analysis_summary,
-                "data_sources": result.get('data_sources', {})
-            })
+                "success": True,
+                "job_id": job.id,
+                "status": job.status,
+                "deduplicated": not created,
+                "status_url": f"/api/granger-causality/jobs/{job.id}",
+                "events_url": f"/api/granger-causality/jobs/{job.id}/events"
+            }), 202
             
         except Exception as e:
-            print(f"❌ Error in granger_causality endpoint: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error submitting analysis job")
             return jsonify({
                 "success": False, 
                 "message": str(e),
                 "error_type": type(e).__name__
             }), 500
     
-    def create_cache_key(stock_prices, symbols_set):
-        """Create a stable cache key from stock prices that includes symbol count"""
-        symbols = sorted(symbols_set)  # Use the symbols set for consistency
-        key_parts = [f"count_{len(symbols)}"]  # Include count to detect additions
+    @app.route('/api/granger-causality/jobs/<job_id>', methods=['GET'])
+    def analysis_job_status(job_id):
+        """Poll a job: status, progress (pairs done / total) and the result once done"""
+        job = job_manager.get(job_id)
+        if job is None:
+            return jsonify({"success": False, "message": f"Unknown job: {job_id}"}), 404
+        return jsonify({"success": True, **job.to_dict()})
+    
+    @app.route('/api/granger-causality/jobs/<job_id>/events', methods=['GET'])
+    def analysis_job_events(job_id):
+        """Server-sent events: 'progress' on every change, then one 'result' or 'error'"""
+        job = job_manager.get(job_id)
+        if job is None:
+            return jsonify({"success": False, "message": f"Unknown job: {job_id}"}), 404
         
-        for symbol in symbols:
-            price = round(float(stock_prices[symbol].get('price', 0)), 2)
-            change = round(float(stock_prices[symbol].get('changePercent', 0)), 1)
-            key_parts.append(f"{symbol}:{price}:{change}")
+        def stream():
+            version = -1
+            while True:
+                # Re-sends the current state as a keep-alive if nothing changes for 15 s
+                version = job.wait_for_change(version, timeout=15)
+                if job.finished:
+                    event = 'result' if job.status == 'done' else 'error'
+                    yield f"event: {event}\ndata: {json.dumps(job.to_dict())}\n\n"
+                    return
+                yield f"event: progress\ndata: {json.dumps(job.to_dict(include_result=False))}\n\n"
         
-        cache_key = "_".join(key_parts)
-        print(f"🔑 Generated cache key: {cache_key[:100]}..." if len(cache_key) > 100 else f"🔑 Generated cache key: {cache_key}")
+        return Response(
+            stream(),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+    
+    def create_cache_key(symbols_set, panel):
+        """Hash of the symbol set and the history window the analysis will run on"""
+        symbols = panel.symbols
+        cache_key = history_fingerprint(symbols, panel.values)
+        if GRANGER_SCREEN_THRESHOLD > 0:
+            # Screened results differ from full ones, so keep them apart in a shared cache
+            cache_key += f":screen={GRANGER_SCREEN_THRESHOLD}"
+        logger.debug("Generated cache key for %d stocks: %.16s...", len(symbols_set), cache_key)
         return cache_key
     
     @app.route('/api/health', methods=['GET'])
@@ -553,46 +1529,220 @@ def run_server():
             "status": "healthy",
             "timestamp": time.time(),
             "cache_size": len(results_cache),
-            "cached_symbol_sets": [list(entry.get('symbols_set', [])) for entry in results_cache.values()]
+            "cache_stats": results_cache.stats(),
+            "pair_cache_stats": get_pair_stats_cache().stats(),
+            "correlation_cache_stats": get_correlation_cache().stats(),
+            "jobs": job_manager.stats(),
+            "index_cache_stats": index_cache.stats(),
+            "precompute": scheduler.stats() if scheduler else None,
+            "warmup": {**popular_sets.stats(), "scheduler": warmup_scheduler.stats() if warmup_scheduler else None},
+            "cached_symbol_sets": [entry.get('symbols', []) for entry in results_cache.values()]
         })
 
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        """Prometheus metrics for this process"""
+        caches = {
+            "results": results_cache,
+            "index": index_cache,
+            "pairs": get_pair_stats_cache(),
+            "correlations": get_correlation_cache()
+        }
+        cache_stats = {(name,): cache.stats() for name, cache in caches.items()}
+        
+        def cache_metric(name, metric_type, help_text, field):
+            samples = {key: stats[field] for key, stats in cache_stats.items()}
+            return format_metric(name, metric_type, help_text, samples, ('cache',))
+        
+        body = ''.join([
+            METRICS.render(),
+            cache_metric('lakshmi_cache_hits_total', 'counter', 'Cache lookups served from the cache', 'hits'),
+            cache_metric('lakshmi_cache_misses_total', 'counter', 'Cache lookups that missed', 'misses'),
+            cache_metric('lakshmi_cache_hit_ratio', 'gauge', 'Hits over lookups since start', 'hit_ratio'),
+            cache_metric('lakshmi_cache_entries', 'gauge', 'Entries currently cached', 'entries'),
+            format_metric(
+                'lakshmi_jobs', 'gauge', 'Background analysis jobs by status',
+                {(status,): count for status, count in job_manager.stats().items()}, ('status',)
+            )
+        ])
+        return Response(body, mimetype='text/plain; version=0.0.4')
+
     @app.route('/api/clear-cache', methods=['POST'])
     def clear_cache():
         """Clear the analysis cache"""
-        cache_count = len(results_cache)
-        results_cache.clear()
-        print(f"🧹 Cache cleared: removed {cache_count} entries")
+        cache_count = results_cache.clear()
+        logger.info("Cache cleared: removed %d entries", cache_count)
         return jsonify({
             "success": True,
             "message": f"Cache cleared: removed {cache_count} entries",
             "cache_size": len(results_cache)
         })
 
-    print("🚀 Starting Enhanced Flask server on port 5001...")
-    print("📡 Available endpoints:")
-    print("  POST /api/granger-causality - Run correlation analysis")
-    print("  GET  /api/health - Health check")
-    print("  POST /api/clear-cache - Clear analysis cache")
+    # Started last: scheduled tasks use the helpers defined above
+    if scheduler:
+        scheduler.start()
+    if warmup_scheduler and start_warmup:
+        warmup_scheduler.start()
+    
+    return app
+
+def print_endpoints():
+    """List the server's routes at startup"""
+    logger.info(
+        "Available endpoints:\n"
+        "  POST /api/granger-causality - Run correlation analysis\n"
+        "  POST /api/granger-causality/stream - Stream edges as they are found (NDJSON, ?format=sse)\n"
+        "  POST /api/granger-causality/rolling - Granger p-values per pair over a sliding window\n"
+        "  GET  /api/granger-causality/index/<index> - Influence graph over a whole index\n"
+        "  POST /api/granger-causality/jobs - Queue analysis, returns job id\n"
+        "  GET  /api/granger-causality/jobs/<id> - Job status, progress and result\n"
+        "  GET  /api/granger-causality/jobs/<id>/events - Job progress as server-sent events\n"
+        "  GET  /api/health - Health check\n"
+        "  GET  /metrics - Prometheus metrics (stage timings, cache hit ratio, in-flight analyses)\n"
+        "  POST /api/clear-cache - Clear analysis cache"
+    )
+    logger.info("Result cache backend: %s", CACHE_BACKEND)
+    if PRECOMPUTE_INDICES:
+        logger.info("Precomputing %s daily at %s %s", ', '.join(PRECOMPUTE_INDICES), PRECOMPUTE_AT, MARKET_TIMEZONE)
+    if WARMUP_SETS > 0:
+        cadence = f"every {WARMUP_INTERVAL}s" if WARMUP_INTERVAL else f"daily at {PRECOMPUTE_AT} {MARKET_TIMEZONE}"
+        logger.info("Keeping the %d most requested symbol sets warm %s", WARMUP_SETS, cadence)
+
+def serve_with_gunicorn(app_factory, host, port, workers, threads, timeout, preload, post_fork=None):
+    """
+    Run the app under gunicorn's threaded workers.
+    
+    With preload the app (and its imports) is built once in the master and
+    shared copy-on-write by the forked workers; without it each worker
+    builds its own after forking. ``post_fork(server, worker)`` runs in each
+    worker right after it is forked.
+    """
+    from gunicorn.app.base import BaseApplication
+    
+    class AnalysisApplication(BaseApplication):
+        def load_config(self):
+            for key, value in {
+                "bind": f"{host}:{port}",
+                "workers": workers,
+                "threads": threads,
+                "worker_class": "gthread",
+                "timeout": timeout,
+                "preload_app": preload,
+            }.items():
+                self.cfg.set(key, value)
+            if post_fork:
+                self.cfg.set("post_fork", post_fork)
+        
+        def load(self):
+            return app_factory()
+    
+    AnalysisApplication().run()
+
+def is_loopback_host(host):
+    """True if host only accepts connections from this machine"""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+def run_server(granger_workers=1, mode=None, workers=None, threads=None, preload=None):
+    """
+    Enhanced Flask server with improved Granger causality analysis
+    Args:
+        granger_workers: Worker processes used for each Granger pair sweep
+        mode: 'dev' (Flask development server), 'waitress' or 'gunicorn'
+        workers: Server processes (gunicorn only)
+        threads: Request threads per server process (waitress and gunicorn)
+        preload: Import the analysis stack up front: before forking gunicorn
+                 workers, or on a background thread for dev and waitress
+    """
+    configure_logging()
+    mode = mode or SERVER_MODE
+    workers = workers or SERVER_WORKERS
+    threads = threads or SERVER_THREADS
+    preload = SERVER_PRELOAD if preload is None else preload
+    
+    def app_factory():
+        if preload:
+            preload_analysis_modules()
+        # Preloaded, this runs in the master, which serves no requests and
+        # whose threads do not survive the fork: warm-up starts per worker
+        return create_app(granger_workers=granger_workers, start_warmup=not preload)
+    
+    def start_worker_warmup(server, worker):
+        warmup_scheduler = worker.app.wsgi().extensions['lakshmi_warmup']
+        if warmup_scheduler:
+            warmup_scheduler.start()
     
-    app.run(port=5001, debug=True, use_reloader=False)
+    def warm_app():
+        # Single-process servers start listening at once and import the
+        # analysis stack in the background; a request that needs it first
+        # simply waits on the import
+        if preload:
+            threading.Thread(target=preload_analysis_modules, name='preload', daemon=True).start()
+        return create_app(granger_workers=granger_workers)
+    
+    if mode == 'dev':
+        logger.info("Starting Flask development server on port %d (Granger workers: %d)", SERVER_PORT, granger_workers)
+        app = warm_app()
+        print_endpoints()
+        # The Werkzeug debugger executes code for whoever reaches it: loopback only
+        debug = is_loopback_host(SERVER_HOST)
+        if not debug:
+            logger.warning("Dev server on non-loopback host %s: debugger disabled; use --server waitress "
+                           "or gunicorn to serve other machines", SERVER_HOST)
+        app.run(host=SERVER_HOST, port=SERVER_PORT, debug=debug, use_reloader=False)
+    elif mode == 'waitress':
+        from waitress import serve
+        logger.info("Starting waitress on %s:%d (%d threads, Granger workers: %d)",
+                    SERVER_HOST, SERVER_PORT, threads, granger_workers)
+        app = warm_app()
+        print_endpoints()
+        serve(app, host=SERVER_HOST, port=SERVER_PORT, threads=threads)
+    elif mode == 'gunicorn':
+        logger.info("Starting gunicorn on %s:%d (%d workers x %d threads, preload: %s, Granger workers: %d)",
+                    SERVER_HOST, SERVER_PORT, workers, threads, preload, granger_workers)
+        if workers > 1:
+            # Each worker process has its own job table and (with the memory backend) its own cache
+            logger.warning("Jobs are tracked per worker: poll job status through a sticky route or use the stream endpoint")
+            if CACHE_BACKEND == 'memory':
+                logger.warning("Memory result cache is per worker; set LAKSHMI_CACHE_BACKEND=sqlite to share it")
+        if PRECOMPUTE_INDICES and CACHE_BACKEND == 'memory':
+            # Preloaded, the scheduler runs in the master and workers never see its results;
+            # otherwise every worker precomputes its own copy
+            logger.warning("Index precompute needs LAKSHMI_CACHE_BACKEND=sqlite to reach gunicorn workers")
+        print_endpoints()
+        serve_with_gunicorn(
+            app_factory, SERVER_HOST, SERVER_PORT, workers, threads, SERVER_TIMEOUT, preload,
+            post_fork=start_worker_warmup if preload else None
+        )
+    else:
+        raise ValueError(f"Unknown server mode: {mode}")
+
+def get_cli_option(name, default=None):
+    """Return the value following ``name`` on the command line, if present"""
+    if name in sys.argv:
+        index = sys.argv.index(name)
+        if index + 1 < len(sys.argv):
+            return sys.argv[index + 1]
+    return default
 
 if __name__ == "__main__":
     if '--run-server' in sys.argv:
-        run_server()
-    elif '--watch' in sys.argv:
-        script_to_run = __file__
-        event_handler = ChangeHandler(script_to_run)
-        observer = Observer()
-        observer.schedule(event_handler, '.', recursive=True)
-        observer.start()
-        print(f"👁️ Watching for changes in the current directory to restart {script_to_run}...")
-        try:
-            while True:
-                time.sleep(1)
-        except KeyboardInterrupt:
-            observer.stop()
-        observer.join()
+        run_server(
+            granger_workers=int(get_cli_option('--granger-workers', 1)),
+            mode=get_cli_option('--server'),
+            workers=int(get_cli_option('--workers', 0)),
+            threads=int(get_cli_option('--threads', 0)),
+            preload=False if '--no-preload' in sys.argv else None
+        )
     else:
         print("Usage:")
         print("  python stock_analysis.py --watch      # Watch mode with auto-restart")
         print("  python stock_analysis.py --run-server # Run Flask server")
+        print("    --granger-workers N                 # Parallel Granger sweep over N processes")
+        print("    --server dev|waitress|gunicorn      # Development or production server")
+        print("    --workers N --threads N             # gunicorn processes, threads per process")
+        print("    --no-preload                        # Import the analysis stack in each worker")
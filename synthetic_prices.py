@@ -0,0 +1,90 @@
+import zlib
+
+import numpy as np
+
+# Market pattern parameters used by the realistic fallback generator
+MOMENTUM = 0.15           # weight of the previous day's return
+MEAN_REVERSION = 0.05     # pull back towards the 20-day average
+REVERSION_WINDOW = 20
+CLUSTER_PROBABILITY = 0.3  # chance a large move is amplified
+CLUSTER_MULTIPLIER = 1.5
+
+
+def symbol_rng(symbol, base_seed=42):
+    """
+    Per-symbol random generator with a seed that is stable across processes.
+
+    ``hash(str)`` is salted by PYTHONHASHSEED, so it gave every worker and
+    every restart a different series; crc32 of the symbol does not.
+    """
+    return np.random.default_rng([base_seed, zlib.crc32(symbol.encode('utf-8'))])
+
+
+def generate_synthetic_prices(symbols, current_prices, change_percents, n_days):
+    """
+    Generate realistic price paths for many symbols at once
+    Args:
+        symbols: List of ticker symbols (used for per-symbol seeding)
+        current_prices: Latest price per symbol
+        change_percents: Latest daily change percent per symbol
+        n_days: Number of daily points to generate
+    Returns:
+        numpy.ndarray of shape (n_days, symbols) with strictly positive prices
+        whose last row lands within 10% of the current price
+    """
+    current_prices = np.asarray(current_prices, dtype=np.float64)
+    change_percents = np.asarray(change_percents, dtype=np.float64)
+    n_symbols = len(symbols)
+    prices = np.empty((n_days, n_symbols))
+    if n_days == 0 or n_symbols == 0:
+        return prices
+
+    # Realistic parameters derived from the current price and change
+    daily_return_mean = (change_percents / 100) / 252  # Convert to daily return
+    daily_volatility = np.clip(np.abs(daily_return_mean) * 3 + 0.01, 0.005, 0.03)
+
+    # Draw every random number up front, one independent stream per symbol
+    shocks = np.empty((max(n_days - 1, 0), n_symbols))
+    cluster_draws = np.empty_like(shocks)
+    final_offsets = np.empty(n_symbols)
+    for j, symbol in enumerate(symbols):
+        rng = symbol_rng(symbol)
+        shocks[:, j] = rng.normal(daily_return_mean[j], daily_volatility[j], n_days - 1)
+        cluster_draws[:, j] = rng.random(n_days - 1)
+        final_offsets[j] = rng.uniform(-0.1, 0.1)
+
+    # Start from a reasonable historical price (80% of current)
+    prices[0] = current_prices * 0.8
+    prev_return = np.zeros(n_symbols)
+    window_sum = prices[0].copy()
+
+    # The recurrence is sequential in time but vectorised across symbols; the
+    # 20-day average is kept as a running sum instead of re-averaging a slice
+    for i in range(n_days - 1):
+        random_return = shocks[i].copy()
+
+        if i > 0:
+            # Momentum (autocorrelation)
+            random_return += MOMENTUM * prev_return
+
+        if i + 1 > REVERSION_WINDOW:
+            # Mean reversion towards the recent average
+            recent_avg = window_sum / REVERSION_WINDOW
+            random_return -= MEAN_REVERSION * (prices[i] - recent_avg) / recent_avg
+
+        if i > 0:
+            # Volatility clustering: large moves are sometimes amplified
+            amplify = (np.abs(random_return) > daily_volatility * 2) & (cluster_draws[i] < CLUSTER_PROBABILITY)
+            random_return[amplify] *= CLUSTER_MULTIPLIER
+
+        prices[i + 1] = np.maximum(prices[i] * (1 + random_return), 0.01)  # Ensure positive prices
+        prev_return = (prices[i + 1] - prices[i]) / prices[i]
+
+        window_sum += prices[i + 1]
+        if i + 1 >= REVERSION_WINDOW:
+            window_sum -= prices[i + 1 - REVERSION_WINDOW]
+
+    # Scale so the final price is close to the current price (within 10%)
+    target_price = current_prices * (1 + final_offsets)
+    prices *= target_price / prices[-1]
+    return prices